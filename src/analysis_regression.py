@@ -2,16 +2,24 @@ import os
 
 # 現在時刻をJSTで取得
 from datetime import datetime
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from zoneinfo import ZoneInfo
 
 import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
+from fingerprint import (
+    find_reusable,
+    load_fingerprints,
+    load_results,
+    report,
+    save_results,
+)
 from sklearn.linear_model import LinearRegression
-from sqlalchemy import create_engine
+from sqlalchemy import bindparam, create_engine, text
 from type.step import StepAnalyzer
-from type.weather import MeteoWeatherAPI
+from type.weather import FixtureWeatherAPI, MeteoWeatherAPI
+from type.weather_archive import WeatherArchive
 
 jst_now = datetime.now(ZoneInfo("Asia/Tokyo"))
 print("JST:", jst_now)
@@ -22,12 +30,16 @@ def get_current_date() -> str:
     return jst_now.strftime("%Y-%m-%d")
 
 
-def load_data(db_url) -> pd.DataFrame:
-    """MySQLデータベースから集約済みデータを読み込む"""
+def load_data(db_url, authors: Optional[List[str]] = None) -> pd.DataFrame:
+    """MySQLデータベースから集約済みデータを読み込む
+
+    authorsを指定した場合はそのauthorのデータのみを読み込む。
+    """
     load_dotenv()
     engine = create_engine(db_url)
 
-    query = """
+    where = "WHERE author IN :authors" if authors is not None else ""
+    query = f"""
     SELECT
         author,
         DATE(created_at) AS analysis_date,
@@ -36,6 +48,7 @@ def load_data(db_url) -> pd.DataFrame:
         MAX(paid_monney) AS final_paid_monney
     FROM
         activity
+    {where}
     GROUP BY
         author,
         analysis_date
@@ -43,7 +56,21 @@ def load_data(db_url) -> pd.DataFrame:
         author,
         analysis_date
     """
-    return pd.read_sql(query, engine)
+    if authors is None:
+        return pd.read_sql(query, engine)
+    if not authors:
+        return pd.DataFrame(
+            columns=[
+                "author",
+                "analysis_date",
+                "avg_temp",
+                "final_steps",
+                "final_paid_monney",
+            ]
+        )
+
+    stmt = text(query).bindparams(bindparam("authors", expanding=True))
+    return pd.read_sql(stmt, engine, params={"authors": authors})
 
 
 def train_model(
@@ -91,50 +118,103 @@ def print_results(
 
 def analyze_user(
     df: pd.DataFrame, author: str, predict_temp: int, predict_steps: int
-) -> None:
+) -> Tuple[np.ndarray, float, float, int]:
     """ユーザーごとの分析を実行する"""
     user_df = df[df["author"] == author].copy()
     model, X, y = train_model(user_df)
     coef, intercept, r2_score = evaluate_model(model, X, y)
     prediction = predict_spending(model, predict_temp, predict_steps)
     print_results(author, coef, intercept, r2_score, prediction)
+    return coef, intercept, r2_score, prediction
+
+
+def get_weather_api() -> MeteoWeatherAPI:
+    """天気APIを取得する（WEATHER_FIXTURE が設定されていればオフライン用のスタブ）"""
+    fixture_file = os.getenv("WEATHER_FIXTURE")
+    if fixture_file:
+        return FixtureWeatherAPI(fixture_file)
+    return MeteoWeatherAPI()
+
+
+def print_step_result(result: dict) -> None:
+    """歩数の予測結果を表示する"""
+    print(f"今日の曜日: {result['day_type']}")
+    print(f"過去データ数: {result['count']}件")
+    print(f"平均歩数: {result['avg_steps']:,}歩")
+    print(f"予測歩数: {result['predicted_steps']:,}歩")
 
 
 def main(db_url) -> None:
     """メイン処理"""
-    df = load_data(db_url)
+    engine = create_engine(db_url)
 
-    # データベースからすべてのauthor名を取得
+    # 気温の予測値は全authorで共通なので1回だけ取得する
+    weather_analyzer = get_weather_api()
+    temp_result = weather_analyzer.get_weather_summary("Tokyo", get_current_date())
+    if temp_result:
+        print(f"平均気温: {temp_result['temp_avg']:.1f}℃")
+        temp: int = int(temp_result["temp_avg"])
+    else:
+        print("天気データの取得に失敗しました")
+        return
+
+    # 入力データが前回から変わっていないauthorは保存済みの結果を再利用する
+    fingerprints = load_fingerprints(engine)
+    reusable = find_reusable(
+        load_results(engine), fingerprints, get_current_date(), temp
+    )
+    for author, cached in reusable.items():
+        print_step_result(cached)
+        print_results(
+            author,
+            np.array([cached["coef_temp"], cached["coef_steps"]]),
+            float(cached["intercept"]),
+            float(cached["r2_score"]),
+            int(cached["prediction"]),
+        )
+
+    # 変更があったauthorのデータのみを読み込んで再計算する
+    changed: List[str] = [a for a in fingerprints if a not in reusable]
+    df = load_data(db_url, changed)
+
+    # 日ごとの天気サマリー（湿度・気圧など）を集約済みデータに結合する
+    df = WeatherArchive(engine, weather_analyzer).enrich(df)
     authors: List[str] = df["author"].unique().tolist()
 
+    rows = []
     for author in authors:
         # ここでモジュールをインポートして気温と歩数の予測値を計算
         # 参照のするのは
         # author:,temp:,steps:,paid_monney:,created_at:
-
-        weather_analyzer = MeteoWeatherAPI()
-        print(type(df))
         author_df = df[df["author"] == author]
         step_anlyzer = StepAnalyzer(author_df)
 
-        temp_result = weather_analyzer.get_weather_summary("Tokyo", get_current_date())
-        if temp_result:
-            print(f"平均気温: {temp_result['temp_avg']:.1f}℃")
-            temp: int = int(temp_result["temp_avg"])
-        else:
-            print("天気データの取得に失敗しました")
-            continue
-
         # step
         result = step_anlyzer.analyze_today()
-
-        print(f"今日の曜日: {result['day_type']}")
-        print(f"過去データ数: {result['count']}件")
-        print(f"平均歩数: {result['avg_steps']:,}歩")
-        print(f"予測歩数: {result['predicted_steps']:,}歩")
+        print_step_result(result)
 
         steps: int = result["predicted_steps"]
-        analyze_user(df, author, temp, steps)
+        coef, intercept, r2_score, prediction = analyze_user(df, author, temp, steps)
+        rows.append(
+            {
+                "author": author,
+                "fingerprint": fingerprints[author],
+                "analysis_date": get_current_date(),
+                "predict_temp": temp,
+                "day_type": result["day_type"],
+                "count": result["count"],
+                "avg_steps": result["avg_steps"],
+                "predicted_steps": steps,
+                "coef_temp": float(coef[0]),
+                "coef_steps": float(coef[1]),
+                "intercept": intercept,
+                "r2_score": r2_score,
+                "prediction": prediction,
+            }
+        )
+
+    save_results(engine, rows)
+    report(len(reusable), len(rows))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,221 @@
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+# authorごとに保持する統計量（Welford法の件数・平均・偏差平方和と直前の累積値）
+STATE_COLUMNS = [
+    "temp_n",
+    "temp_mean",
+    "temp_m2",
+    "steps_n",
+    "steps_mean",
+    "steps_m2",
+    "spend_n",
+    "spend_mean",
+    "spend_m2",
+    "last_created_at",
+    "last_steps",
+    "last_paid_monney",
+]
+
+# 統計量の名前と、それに対応する判定用の列（累積値は1時間あたりの増加量を使う）
+STAT_COLUMNS = {"temp": "temp", "steps": "_steps_rate", "spend": "_spend_rate"}
+
+ANOMALY_STEPS_BACKWARDS = "steps_backwards"
+ANOMALY_SPEND_BACKWARDS = "spend_backwards"
+ANOMALY_STEPS_SPIKE = "steps_spike"
+ANOMALY_SPEND_SPIKE = "spend_spike"
+ANOMALY_TEMP_OUTLIER = "temp_outlier"
+
+# 外れ値を取り除いて判定し直す最大回数
+MAX_PASSES = 10
+
+
+class ActivityAnomalyDetector:
+    """activityの取り込み時に異常値を検出する
+
+    authorごとにO(1)の統計量だけを保持し、受け取ったバッチ全体を
+    ベクトル演算でまとめて判定する。各行はバッチ到着前の統計量に
+    バッチ内でそれより前に受け入れた行を加えた統計量で判定し、
+    累積値は直前に受け入れた値（同日内の最大値）と比較する。
+    """
+
+    def __init__(self, z_threshold=4.0, min_samples=24, state=None):
+        self.z_threshold = z_threshold
+        # 統計量が安定するまではzスコアによる判定を行わない
+        self.min_samples = min_samples
+        if state is not None:
+            self.state = state[STATE_COLUMNS].copy()
+        else:
+            self.state = pd.DataFrame(columns=STATE_COLUMNS)
+            self.state.index.name = "author"
+
+    def check(self, batch: pd.DataFrame) -> pd.DataFrame:
+        """バッチの各行に異常の種類を付与して返す（正常な行は空文字）
+
+        増加量・気温の外れ値を見つけたらその行を除いて判定し直し、
+        外れ値が無くなった時点で直前に受け入れた値より減少した行を判定する。
+        不正に大きな値の次の正常な行が「減少」と誤判定されないようにするため。
+        """
+        df = batch.sort_values(["author", "created_at"], kind="stable").copy()
+        df["_created_at"] = pd.to_datetime(df["created_at"])
+        df["_date"] = df["_created_at"].dt.normalize()
+        codes = pd.factorize(df["author"])[0]
+
+        # バッチ到着前の統計量を各行に対応付ける
+        prev = self.state.reindex(df["author"])
+        prev.index = df.index
+        prev["last_created_at"] = pd.to_datetime(prev["last_created_at"])
+
+        anomaly = np.full(len(df), "", dtype=object)
+        for _ in range(MAX_PASSES):
+            kept = anomaly == ""
+            rows = self._score(df[kept], codes[kept], prev[kept])
+
+            outliers = rows["outlier"].to_numpy()
+            if outliers.any():
+                anomaly[np.flatnonzero(kept)[outliers != ""]] = outliers[outliers != ""]
+                continue
+
+            backwards = rows["backwards"].to_numpy()
+            anomaly[np.flatnonzero(kept)] = backwards
+            break
+
+        df["anomaly"] = anomaly
+        accepted = anomaly == ""
+        self._update(df[accepted].join(rows[["_steps_rate", "_spend_rate"]]))
+        return df.drop(columns=["_created_at", "_date"])
+
+    def split(self, batch: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """バッチを正常な行と隔離する行に分ける"""
+        checked = self.check(batch)
+        is_anomaly = checked["anomaly"] != ""
+        clean = checked[~is_anomaly].drop(columns=["anomaly"])
+        return clean, checked[is_anomaly]
+
+    def _score(self, df: pd.DataFrame, codes, prev: pd.DataFrame) -> pd.DataFrame:
+        """受け入れ候補の行だけで増加量・外れ値・減少を判定する"""
+        # 同日内で直前までに受け入れた累積値の最大値（無ければ保存済みの値）
+        day_key = [codes, df["_date"].to_numpy()]
+        last_created_at = prev["last_created_at"]
+        state_same_day = (last_created_at.dt.normalize() == df["_date"]).to_numpy()
+        result = pd.DataFrame(index=df.index)
+        increase = {}
+        for col, last_col, name in (
+            ("steps", "last_steps", "steps"),
+            ("paid_monney", "last_paid_monney", "spend"),
+        ):
+            values = df[col].astype(float)
+            prior_max = values.groupby(day_key).cummax().groupby(day_key).shift()
+            seed = prev[last_col].astype(float).where(state_same_day)
+            prior_max = np.fmax(prior_max.to_numpy(), seed.to_numpy())
+
+            # 日付が変わった直後はリセット後の値そのものが増加量
+            increase[name] = values.to_numpy() - np.nan_to_num(prior_max, nan=0.0)
+
+        # 減少した行は統計量にも外れ値判定にも使わない
+        is_back = {name: inc < 0 for name, inc in increase.items()}
+        valid = ~(is_back["steps"] | is_back["spend"])
+
+        # 直前に受け入れた行からの経過時間（同日内の最初の行は0時から）
+        accepted_at = df["_created_at"].where(valid)
+        prior_at = accepted_at.groupby(day_key).shift().groupby(day_key).ffill()
+        prior_at = prior_at.fillna(last_created_at.where(state_same_day))
+        prior_at = prior_at.fillna(df["_date"])
+        hours = (df["_created_at"] - prior_at).dt.total_seconds() / 3600
+
+        # 取得間隔の違いで外れ値にならないよう1時間あたりの増加量で判定する
+        for name, inc in increase.items():
+            result[f"_{name}_rate"] = inc / np.maximum(hours.to_numpy(), 1.0)
+
+        steps_spike = self._outlier(
+            result["_steps_rate"].to_numpy(), codes, valid, prev, "steps"
+        )
+        spend_spike = self._outlier(
+            result["_spend_rate"].to_numpy(), codes, valid, prev, "spend"
+        )
+        temp_outlier = self._outlier(
+            df["temp"].to_numpy(dtype=float), codes, valid, prev, "temp"
+        )
+
+        result["outlier"] = np.select(
+            [valid & steps_spike, valid & spend_spike, valid & temp_outlier],
+            [ANOMALY_STEPS_SPIKE, ANOMALY_SPEND_SPIKE, ANOMALY_TEMP_OUTLIER],
+            default="",
+        )
+        result["backwards"] = np.select(
+            [is_back["steps"], is_back["spend"]],
+            [ANOMALY_STEPS_BACKWARDS, ANOMALY_SPEND_BACKWARDS],
+            default="",
+        )
+        return result
+
+    def _outlier(self, values, codes, valid, prev, name) -> np.ndarray:
+        """保存済みの統計量とバッチ内でそれより前の行からzスコアを求めて判定する
+
+        増加量は正の方向の外れ値だけを異常とする。
+        """
+        weight = valid.astype(float)
+        x = np.where(valid, values, 0.0)
+        grouped = pd.DataFrame({"c": weight, "s": x, "ss": x * x}).groupby(codes)
+        # 自分自身を含まない累積和
+        prior = grouped.cumsum() - np.column_stack([weight, x, x * x])
+
+        n0 = prev[f"{name}_n"].astype(float).fillna(0).to_numpy()
+        mean0 = prev[f"{name}_mean"].astype(float).fillna(0).to_numpy()
+        m20 = prev[f"{name}_m2"].astype(float).fillna(0).to_numpy()
+
+        n = n0 + prior["c"].to_numpy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = (n0 * mean0 + prior["s"].to_numpy()) / n
+            m2 = m20 + n0 * mean0**2 + prior["ss"].to_numpy() - n * mean**2
+            std = np.sqrt(np.maximum(m2, 0) / (n - 1))
+            z = (values - mean) / std
+        if name != "temp":
+            z = np.where(values > 0, z, 0.0)
+        else:
+            z = np.abs(z)
+        return (n >= self.min_samples) & (std > 0) & (z > self.z_threshold)
+
+    def _update(self, clean: pd.DataFrame) -> None:
+        """正常な行で統計量を更新する（Chanの並列アルゴリズムで合成）"""
+        if clean.empty:
+            return
+
+        # authorがカテゴリ型でも、バッチに含まれるauthorだけを集計する
+        grouped = clean.groupby("author", sort=False, observed=True)
+        last = grouped.last()
+        batch = pd.DataFrame(
+            {
+                "last_created_at": last["_created_at"].to_numpy(),
+                "last_steps": last["steps"].to_numpy(),
+                "last_paid_monney": last["paid_monney"].to_numpy(),
+            },
+            index=pd.Index(last.index.astype(object), name="author"),
+        )
+        for name, col in STAT_COLUMNS.items():
+            n = grouped[col].count().astype(float)
+            batch[f"{name}_n"] = n.to_numpy()
+            batch[f"{name}_mean"] = grouped[col].mean().to_numpy()
+            batch[f"{name}_m2"] = (grouped[col].var(ddof=0) * n).to_numpy()
+
+        prev = self.state.reindex(batch.index)
+        for name in STAT_COLUMNS:
+            n_a = prev[f"{name}_n"].fillna(0).astype(float)
+            mean_a = prev[f"{name}_mean"].fillna(0).astype(float)
+            m2_a = prev[f"{name}_m2"].fillna(0).astype(float)
+            n_b = batch[f"{name}_n"]
+            mean_b = batch[f"{name}_mean"]
+            m2_b = batch[f"{name}_m2"]
+
+            n = n_a + n_b
+            delta = mean_b - mean_a
+            batch[f"{name}_n"] = n
+            batch[f"{name}_mean"] = mean_a + delta * n_b / n
+            batch[f"{name}_m2"] = m2_a + m2_b + delta**2 * n_a * n_b / n
+
+        batch = batch[STATE_COLUMNS]
+        others = self.state.drop(index=batch.index, errors="ignore")
+        self.state = pd.concat([others, batch]) if not others.empty else batch
+        self.state.index.name = "author"
@@ -0,0 +1,296 @@
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+DAY_NAMES = [
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+    "Sunday",
+]
+
+TARGET_COLUMN = "final_paid_monney"
+
+
+def _author_mean(values: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """各行のauthorの（欠損を除いた）平均。値が1つも無いauthorはNaN"""
+    present = ~np.isnan(values)
+    count = np.bincount(codes, weights=present)
+    total = np.bincount(codes, weights=np.where(present, values, 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (total / count)[codes]
+
+
+def _fill_missing(values: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """欠損を同じauthorの平均、無ければ全体の平均（それも無ければ0）で補う"""
+    values = np.array(values, dtype=float)
+    missing = np.isnan(values)
+    if not missing.any():
+        return values
+
+    fill = _author_mean(values, codes)
+    overall = np.nanmean(values) if not missing.all() else 0.0
+    fill = np.where(np.isnan(fill), overall, fill)
+    values[missing] = fill[missing]
+    return values
+
+
+def build_features(daily_df: pd.DataFrame) -> pd.DataFrame:
+    """集約済みデータ（authorごと・日ごと）から説明変数を作る
+
+    気温・歩数に加えて、前日の飲料代・湿度（あれば）・曜日のone-hotを使う。
+    前日の飲料代は暦の上で前日の値で、記録が無い日は同じauthorの平均で補う。
+    authorは一度だけ整数に変換し、以降の集計は整数のまま行う。
+    """
+    codes, authors = pd.factorize(daily_df["author"])
+    date = pd.to_datetime(daily_df["analysis_date"]).dt.normalize().to_numpy()
+    order = np.lexsort((date, codes))
+    if (order[1:] < order[:-1]).any():
+        daily_df = daily_df.iloc[order]
+        codes = codes[order]
+        date = date[order]
+
+    features = pd.DataFrame(
+        {
+            "author": pd.Categorical.from_codes(codes, authors),
+            "avg_temp": _fill_missing(daily_df["avg_temp"].to_numpy(), codes),
+            "final_steps": _fill_missing(daily_df["final_steps"].to_numpy(), codes),
+        },
+        index=daily_df.index,
+    )
+
+    # (author, 日付) で並べたので、前の行が同じauthorの前日なら前日の値になる
+    paid = daily_df[TARGET_COLUMN].to_numpy(dtype=float)
+    is_prev_day = np.zeros(len(paid), dtype=bool)
+    is_prev_day[1:] = (codes[1:] == codes[:-1]) & (
+        date[1:] - date[:-1] == np.timedelta64(1, "D")
+    )
+    prev_paid = np.full(len(paid), np.nan)
+    prev_paid[1:] = np.where(is_prev_day[1:], paid[:-1], np.nan)
+    missing = np.isnan(prev_paid)
+    prev_paid[missing] = np.nan_to_num(_author_mean(paid, codes)[missing])
+    features["prev_paid_monney"] = prev_paid
+
+    if "humidity_avg" in daily_df.columns and daily_df["humidity_avg"].notna().any():
+        features["humidity_avg"] = _fill_missing(
+            daily_df["humidity_avg"].to_numpy(dtype=float), codes
+        )
+
+    day_of_week = pd.DatetimeIndex(date).dayofweek.to_numpy()
+    for i, day in enumerate(DAY_NAMES):
+        features[f"is_{day}"] = (day_of_week == i).astype(float)
+
+    return features
+
+
+class BatchRidgeRegression:
+    """全authorのリッジ回帰をまとめて解く
+
+    authorごとの X^T X・X^T y を行のまま（日数の違うauthorを詰めた配列を作らずに）
+    集計し、(author, 特徴量, 特徴量) の正規方程式をNumPyのバッチ演算で一度に解く。
+    データ日数が min_days に満たないauthorほど正則化を強め、
+    全authorをまとめて学習した係数に近づけることで係数を安定させる。
+    features で使う特徴量を絞り込める（省略時は使えるものすべて）。
+    """
+
+    def __init__(self, alpha=1.0, min_days=14, features=None):
+        self.alpha = alpha
+        self.min_days = min_days
+        self.features = features
+
+    def fit(self, daily_df: pd.DataFrame) -> "BatchRidgeRegression":
+        # 飲料代が欠損している日は学習に使わない
+        if daily_df[TARGET_COLUMN].isna().any():
+            daily_df = daily_df[daily_df[TARGET_COLUMN].notna()]
+        features = build_features(daily_df)
+        self.feature_names: List[str] = self.features or [
+            c for c in features.columns if c != "author"
+        ]
+        n_features = len(self.feature_names)
+
+        if features.empty:
+            self._fit_empty(n_features)
+            return self
+
+        codes, authors = pd.factorize(features["author"])
+        self.authors = pd.Index(authors)
+        n_authors = len(authors)
+        n_days = np.bincount(codes, minlength=n_authors).astype(float)
+
+        def segment_sum(values):
+            """authorごとの合計（行の配列をauthor数の配列にまとめる）"""
+            return np.bincount(codes, weights=values, minlength=n_authors)
+
+        # 日数の違うauthorを詰めた配列は作らず、行のまま扱う（中心化はその場で行う）
+        # build_featuresで並べ替えた場合は行の順を合わせる（load_dataの結果は並べ替え済み）
+        if not features.index.equals(daily_df.index):
+            daily_df = daily_df.loc[features.index]
+        y = daily_df[TARGET_COLUMN].to_numpy(dtype=float)
+        X = features[self.feature_names].to_numpy(dtype=float, copy=True)
+        del features
+        self.pooled_x_mean_ = X.mean(axis=0)
+        self.pooled_y_mean_ = float(y.mean())
+
+        # authorごとに中心化する（切片は正則化しない）
+        x_mean = np.column_stack(
+            [segment_sum(X[:, f]) for f in range(n_features)]
+        ) / n_days[:, None]
+        y_mean = segment_sum(y) / n_days
+        for f in range(n_features):
+            X[:, f] -= x_mean[codes, f]
+        yc = y - y_mean[codes]
+
+        # X^T X と X^T y を行の積のauthorごとの合計として求める
+        XtX = np.empty((n_authors, n_features, n_features))
+        for f in range(n_features):
+            for g in range(f, n_features):
+                XtX[:, f, g] = XtX[:, g, f] = segment_sum(X[:, f] * X[:, g])
+        Xty = np.column_stack([segment_sum(X[:, f] * yc) for f in range(n_features)])
+
+        # authorごとに標準化した正規方程式にする
+        x_scale = np.sqrt(np.diagonal(XtX, axis1=1, axis2=2) / n_days[:, None])
+        x_scale[x_scale == 0] = 1.0
+        XtX_s = XtX / (x_scale[:, :, None] * x_scale[:, None, :])
+        Xty_s = Xty / x_scale
+        eye = np.eye(n_features)
+
+        # 全authorをまとめた係数（各authorの事前分布として使う）。
+        # authorごとに標準化の尺度が違うため、元の単位に戻してから各authorの尺度に合わせる
+        pooled_XtX = XtX.sum(axis=0)
+        pooled_scale = np.sqrt(np.diag(pooled_XtX) / n_days.sum())
+        pooled_scale[pooled_scale == 0] = 1.0
+        pooled = np.linalg.solve(
+            pooled_XtX / np.outer(pooled_scale, pooled_scale) + self.alpha * eye,
+            Xty.sum(axis=0) / pooled_scale,
+        )
+        self.pooled_coef_ = pooled / pooled_scale
+        prior = self.pooled_coef_[None, :] * x_scale
+
+        lam = self.alpha + np.maximum(self.min_days - n_days, 0)
+        A = XtX_s + lam[:, None, None] * eye
+        b = Xty_s + lam[:, None] * prior
+        coef_scaled = np.linalg.solve(A, b[..., None])[..., 0]
+
+        self.coef_ = coef_scaled / x_scale
+        self.intercept_ = y_mean - (x_mean * self.coef_).sum(axis=1)
+        self.n_days_ = n_days.astype(int)
+
+        # 学習データでの決定係数
+        fitted = np.zeros(len(yc))
+        for f in range(n_features):
+            fitted += X[:, f] * self.coef_[codes, f]
+        ss_res = segment_sum((yc - fitted) ** 2)
+        ss_tot = segment_sum(yc**2)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.r2_score_ = np.where(ss_tot > 0, 1 - ss_res / ss_tot, 0.0)
+
+        # 予測時に前日の飲料代・平均湿度を引けるようにauthorごとの値を覚えておく
+        # 行はauthor・日付の順に並んでいるので、authorごとの最後の行が最終日
+        last = np.flatnonzero(np.append(codes[1:] != codes[:-1], True))
+        last_dates = pd.to_datetime(daily_df["analysis_date"].iloc[last])
+        self.last_date_ = last_dates.dt.normalize().to_numpy()
+        self.last_paid_monney_ = y[last]
+        self.paid_monney_mean_ = y_mean
+        self.humidity_mean_ = np.full(n_authors, np.nan)
+        if "humidity_avg" in self.feature_names:
+            self.humidity_mean_ = x_mean[:, self.feature_names.index("humidity_avg")]
+        return self
+
+    def _fit_empty(self, n_features: int) -> None:
+        """学習データが無い場合（新しいデータベースなど）は空のモデルにする"""
+        self.authors = pd.Index([])
+        self.coef_ = np.zeros((0, n_features))
+        self.intercept_ = np.zeros(0)
+        self.n_days_ = np.zeros(0, dtype=int)
+        self.r2_score_ = np.zeros(0)
+        self.pooled_coef_ = np.zeros(n_features)
+        # 全authorをまとめた予測もできない（NaNになる）
+        self.pooled_x_mean_ = np.zeros(n_features)
+        self.pooled_y_mean_ = np.nan
+        self.last_date_ = np.array([], dtype="datetime64[ns]")
+        self.last_paid_monney_ = np.zeros(0)
+        self.paid_monney_mean_ = np.zeros(0)
+        self.humidity_mean_ = np.zeros(0)
+
+    def coef_frame(self) -> pd.DataFrame:
+        """authorごとの係数・切片・決定係数を表にする"""
+        result = pd.DataFrame(self.coef_, index=self.authors, columns=self.feature_names)
+        result["intercept"] = self.intercept_
+        result["r2_score"] = self.r2_score_
+        result["n_days"] = self.n_days_
+        return result
+
+    def _design_matrix(
+        self, date, n_rows, temp, steps, prev_paid, humidity
+    ) -> np.ndarray:
+        """予測用の説明変数を特徴量の順に並べる"""
+        values = {
+            "avg_temp": np.broadcast_to(np.asarray(temp, dtype=float), n_rows),
+            "final_steps": np.broadcast_to(np.asarray(steps, dtype=float), n_rows),
+            "prev_paid_monney": prev_paid,
+            "humidity_avg": humidity,
+        }
+        day_name = date.day_name()
+        for day in DAY_NAMES:
+            values[f"is_{day}"] = np.full(n_rows, float(day == day_name))
+        return np.column_stack(
+            [np.broadcast_to(values[name], n_rows) for name in self.feature_names]
+        )
+
+    def predict(
+        self,
+        date,
+        temp,
+        steps,
+        humidity: Optional[float] = None,
+        authors: Optional[List[str]] = None,
+    ) -> pd.Series:
+        """指定日の飲料代を全author分まとめて予測する
+
+        temp・stepsはスカラーまたはauthorごとの配列。前日の飲料代は
+        学習データの最終日が指定日の前日ならその値、そうでなければauthorの平均を使う。
+        humidityを省略した場合（NaNの場合も）はauthorの平均を使う。
+        authorsに学習データの無いauthorを含めるとその予測はNaNになる。
+        """
+        n_authors = len(self.authors)
+        date = pd.Timestamp(date).normalize()
+        is_prev_day = self.last_date_ == np.datetime64(date - pd.Timedelta(days=1))
+        prev_paid = np.where(is_prev_day, self.last_paid_monney_, self.paid_monney_mean_)
+        if humidity is None or pd.isna(humidity):
+            humidity = self.humidity_mean_
+        X = self._design_matrix(date, n_authors, temp, steps, prev_paid, humidity)
+
+        prediction = pd.Series(
+            (X * self.coef_).sum(axis=1) + self.intercept_, index=self.authors
+        )
+        if authors is not None:
+            prediction = prediction.reindex(authors)
+        return prediction
+
+    def predict_pooled(
+        self, date, temp, steps, humidity: Optional[float] = None
+    ) -> np.ndarray:
+        """学習データの無いauthor向けに、全authorをまとめた係数で予測する
+
+        前日の飲料代・湿度（省略時）は学習データ全体の平均を使う。
+        学習データが1件も無い場合はNaNになる。
+        """
+        date = pd.Timestamp(date).normalize()
+        n_rows = np.broadcast(np.asarray(temp), np.asarray(steps)).size
+        pooled_mean = dict(zip(self.feature_names, self.pooled_x_mean_))
+        if humidity is None or pd.isna(humidity):
+            humidity = pooled_mean.get("humidity_avg", np.nan)
+        X = self._design_matrix(
+            date,
+            n_rows,
+            temp,
+            steps,
+            pooled_mean.get("prev_paid_monney", np.nan),
+            humidity,
+        )
+        intercept = self.pooled_y_mean_ - self.pooled_x_mean_ @ self.pooled_coef_
+        return X @ self.pooled_coef_ + intercept
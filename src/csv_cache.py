@@ -0,0 +1,154 @@
+import json
+import os
+import shutil
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+# CSVごとの列の型（キーはファイル名）
+SCHEMAS: Dict[str, dict] = {
+    "dammy_step_data.csv": {
+        "dtype": {
+            "day_type": "category",
+            "template": "int64",
+            "steps": "int64",
+            "paid_money": "int64",
+            "create_at": "int64",
+            "date": "category",
+        },
+    },
+    "dummy_activity.csv": {
+        "dtype": {
+            "author": "category",
+            "temp": "float64",
+            "steps": "int64",
+            "paid_monney": "int64",
+        },
+        "parse_dates": ["created_at"],
+        "date_format": "%Y-%m-%d %H:%M:%S",
+    },
+}
+
+META_FILE = "meta.json"
+
+
+def _cache_dir(csv_file: str) -> str:
+    """キャッシュの保存先（CSV_CACHE_DIR が無ければCSVと同じディレクトリ）"""
+    base = os.getenv("CSV_CACHE_DIR") or os.path.join(
+        os.path.dirname(os.path.abspath(csv_file)), ".csv_cache"
+    )
+    return os.path.join(base, os.path.basename(csv_file))
+
+
+def _source_key(csv_file: str) -> dict:
+    """キャッシュの有効性を判定するためのCSVの更新日時とサイズ"""
+    stat = os.stat(csv_file)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _read_kwargs(csv_file: str, schema: Optional[dict]) -> dict:
+    if schema is None:
+        schema = SCHEMAS.get(os.path.basename(csv_file), {})
+    return dict(schema)
+
+
+def _write_cache(df: pd.DataFrame, cache_dir: str, source: dict) -> None:
+    """列ごとに .npy ファイルとして保存する（meta.json は最後に書く）"""
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.makedirs(cache_dir)
+
+    columns = []
+    for i, name in enumerate(df.columns):
+        col = df[name]
+        column = {"name": name}
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            kind = "category"
+            np.save(os.path.join(cache_dir, f"{i}.npy"), col.cat.codes.to_numpy())
+            np.save(
+                os.path.join(cache_dir, f"{i}.categories.npy"),
+                col.cat.categories.to_numpy(dtype=str),
+            )
+        elif pd.api.types.is_datetime64_dtype(col.dtype):
+            # パースしたときと同じ単位（pandasのバージョンでnsかusか変わる）で保存する
+            kind = "datetime"
+            values = col.to_numpy()
+            np.save(os.path.join(cache_dir, f"{i}.npy"), values.view("int64"))
+            column["dtype"] = str(values.dtype)
+        elif pd.api.types.is_numeric_dtype(col.dtype):
+            kind = "numeric"
+            np.save(os.path.join(cache_dir, f"{i}.npy"), col.to_numpy())
+        else:
+            # 型が指定されていない文字列の列はカテゴリとして保存する
+            kind = "category"
+            cat = col.astype(str).astype("category")
+            np.save(os.path.join(cache_dir, f"{i}.npy"), cat.cat.codes.to_numpy())
+            np.save(
+                os.path.join(cache_dir, f"{i}.categories.npy"),
+                cat.cat.categories.to_numpy(dtype=str),
+            )
+        column["kind"] = kind
+        columns.append(column)
+
+    with open(os.path.join(cache_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump({"source": source, "columns": columns}, f, ensure_ascii=False)
+
+
+def _read_cache(cache_dir: str, source: dict) -> Optional[pd.DataFrame]:
+    """有効なキャッシュがあればメモリマップで読み込む（無ければNone）"""
+    try:
+        with open(os.path.join(cache_dir, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("source") != source:
+        return None
+
+    data = {}
+    for i, column in enumerate(meta["columns"]):
+        values = np.load(os.path.join(cache_dir, f"{i}.npy"), mmap_mode="r")
+        if column["kind"] == "category":
+            categories = np.load(os.path.join(cache_dir, f"{i}.categories.npy"))
+            values = pd.Categorical.from_codes(values, categories)
+        elif column["kind"] == "datetime":
+            values = values.view(column.get("dtype", "datetime64[ns]"))
+        data[column["name"]] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def load_csv(csv_file: str, schema: Optional[dict] = None) -> pd.DataFrame:
+    """CSVを型付きで読み込む
+
+    初回はスキーマに従ってパースし、列ごとのバイナリキャッシュを作成する。
+    CSVの更新日時とサイズが変わらない限り、以降はキャッシュをメモリマップで読み込む。
+    メモリマップした列は読み取り専用なので、値を書き換える場合はコピーしてから使う。
+    """
+    source = _source_key(csv_file)
+    cache_dir = _cache_dir(csv_file)
+
+    cached = _read_cache(cache_dir, source)
+    if cached is not None:
+        return cached
+
+    df = pd.read_csv(csv_file, **_read_kwargs(csv_file, schema))
+    try:
+        _write_cache(df, cache_dir, source)
+    except OSError as e:
+        # 書き込めない環境（Lambdaなど）ではキャッシュせずに返す
+        print(f"CSVキャッシュの作成に失敗しました: {e}")
+    return df
+
+
+def iter_csv_chunks(
+    csv_file: str, chunksize: int = 100_000, schema: Optional[dict] = None
+) -> Iterator[pd.DataFrame]:
+    """CSVを型付きのチャンクに分けて順に返す（キャッシュがあればその一部を返す）"""
+    cached = _read_cache(_cache_dir(csv_file), _source_key(csv_file))
+    if cached is not None:
+        for start in range(0, len(cached), chunksize):
+            yield cached.iloc[start : start + chunksize]
+        return
+
+    yield from pd.read_csv(
+        csv_file, chunksize=chunksize, **_read_kwargs(csv_file, schema)
+    )
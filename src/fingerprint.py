@@ -0,0 +1,109 @@
+import hashlib
+from typing import Dict, List
+
+import pandas as pd
+from sqlalchemy import bindparam, inspect, text
+from sqlalchemy.engine import Engine
+
+# 分析結果を保存するテーブル名
+RESULT_TABLE = "analysis_result"
+
+RESULT_COLUMNS = [
+    "author",
+    "fingerprint",
+    "analysis_date",
+    "predict_temp",
+    "day_type",
+    "count",
+    "avg_steps",
+    "predicted_steps",
+    "coef_temp",
+    "coef_steps",
+    "intercept",
+    "r2_score",
+    "prediction",
+]
+
+
+def load_fingerprints(engine: Engine) -> Dict[str, str]:
+    """authorごとの入力データのフィンガープリントを取得する
+
+    行数・最新のcreated_at・各行のCRC32の合計から計算するため、
+    activityテーブル全体を読み込まずに変更の有無を判定できる。
+    """
+    query = """
+    SELECT
+        author,
+        COUNT(*) AS row_count,
+        MAX(created_at) AS max_created_at,
+        SUM(CRC32(CONCAT_WS('|', temp, steps, paid_monney, created_at))) AS checksum
+    FROM
+        activity
+    GROUP BY
+        author
+    """
+    df = pd.read_sql(query, engine)
+
+    fingerprints: Dict[str, str] = {}
+    for row in df.itertuples(index=False):
+        key = f"{row.row_count}|{row.max_created_at}|{row.checksum}"
+        fingerprints[row.author] = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return fingerprints
+
+
+def load_results(engine: Engine) -> pd.DataFrame:
+    """保存済みの分析結果を読み込む（テーブルが無ければ空）
+
+    接続エラーなどは握りつぶさない。全authorを再計算して上書きしてしまうため。
+    """
+    with engine.connect() as conn:
+        if not inspect(conn).has_table(RESULT_TABLE):
+            print("保存済みの分析結果はありません")
+            return pd.DataFrame(columns=RESULT_COLUMNS)
+        return pd.read_sql(text(f"SELECT * FROM {RESULT_TABLE}"), conn)
+
+
+def find_reusable(
+    results: pd.DataFrame,
+    fingerprints: Dict[str, str],
+    analysis_date: str,
+    predict_temp: int,
+) -> Dict[str, dict]:
+    """入力が変わっていないauthorの保存済み結果を返す
+
+    予測値は日付（曜日）と予測気温にも依存するため、
+    フィンガープリントに加えてそれらが一致する場合のみ再利用する。
+    """
+    if results.empty:
+        return {}
+
+    expected = results["author"].map(fingerprints)
+    mask = (
+        (results["fingerprint"] == expected)
+        & (results["analysis_date"].astype(str) == analysis_date)
+        & (results["predict_temp"] == predict_temp)
+    )
+    reusable = results[mask].drop_duplicates("author", keep="last")
+    return {row["author"]: row for row in reusable.to_dict("records")}
+
+
+def save_results(engine: Engine, rows: List[dict]) -> None:
+    """再計算したauthorの分析結果を保存する（既存行は置き換え）"""
+    if not rows:
+        return
+
+    df = pd.DataFrame(rows, columns=RESULT_COLUMNS)
+    authors: List[str] = df["author"].tolist()
+
+    with engine.begin() as conn:
+        if inspect(conn).has_table(RESULT_TABLE):
+            stmt = text(f"DELETE FROM {RESULT_TABLE} WHERE author IN :authors")
+            stmt = stmt.bindparams(bindparam("authors", expanding=True))
+            conn.execute(stmt, {"authors": authors})
+        df.to_sql(RESULT_TABLE, con=conn, if_exists="append", index=False)
+
+
+def report(skipped: int, recomputed: int) -> None:
+    """スキップ件数と再計算件数を表示する"""
+    total = skipped + recomputed
+    print(f"\n対象author数: {total}件 (スキップ: {skipped}件, 再計算: {recomputed}件)")
@@ -1,8 +1,9 @@
 import os
 
-import pandas as pd
+from anomaly import ActivityAnomalyDetector
+from csv_cache import load_csv
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import DateTime, String, create_engine
 
 # --- 1. 環境変数の読み込みとデータベースへの接続設定 ---
 load_dotenv()  # .envファイルから環境変数を読み込む
@@ -25,19 +26,41 @@ except Exception as e:
 
 # --- 2. CSVファイルの読み込み ---
 try:
-    df = pd.read_csv("dummy_activity.csv")
+    df = load_csv("dummy_activity.csv")
     print("✅ CSVファイルの読み込みに成功しました。")
     print(df)
 except FileNotFoundError:
     print("❌ エラー: dummy_activity.csv が見つかりません。")
     exit()
 
-# --- 3. DataFrameをデータベースにインサート ---
+# --- 3. 異常値の検出 ---
+# 日中に減少した累積値や支出・気温の外れ値は集計に混ざらないよう隔離する
+detector = ActivityAnomalyDetector()
+df, quarantined = detector.split(df)
+print(f"✅ 異常値の検出が完了しました。（隔離: {len(quarantined)}件）")
+if not quarantined.empty:
+    print(quarantined["anomaly"].value_counts())
+
+# --- 4. DataFrameをデータベースにインサート ---
 # テーブル名: 'activity'
 # if_exists='append': テーブルが既に存在する場合、データを追加する
 # index=False: DataFrameのインデックスをDBのカラムとして保存しない
+# dtype: show_table.py のページネーション用インデックスを張れる型にする
 try:
-    df.to_sql("activity", con=engine, if_exists="replace", index=False)
+    df.to_sql(
+        "activity",
+        con=engine,
+        if_exists="replace",
+        index=False,
+        dtype={"author": String(255), "created_at": DateTime()},
+    )
     print("\n✅ データベースへのデータインサートが完了しました。")
 except Exception as e:
     print(f"\n❌ データベースへのインサート中にエラーが発生しました: {e}")
+
+try:
+    quarantined.to_sql(
+        "activity_quarantine", con=engine, if_exists="replace", index=False
+    )
+except Exception as e:
+    print(f"\n❌ 隔離データのインサート中にエラーが発生しました: {e}")
@@ -1,18 +1,30 @@
+import json
 import os
+from functools import lru_cache
 
 import boto3
+from sqlalchemy import create_engine
 
 # 他のpyファイルから関数をインポートする場合
 from analysis_regression import *
+from precompute import get_forecast, precompute
 
 ssm = boto3.client("ssm")
 
 
+@lru_cache(maxsize=None)
 def get_parameter(name):
+    # 同じコンテナで再利用される間は値をキャッシュしてSSMの呼び出しを省く
     response = ssm.get_parameter(Name=name, WithDecryption=True)
     return response["Parameter"]["Value"]
 
 
+@lru_cache(maxsize=None)
+def get_engine(db_url):
+    """コンテナ内で使い回すエンジン（コネクションプール）を取得する"""
+    return create_engine(db_url, pool_pre_ping=True)
+
+
 def lambda_handler(event, context):
     """
     この関数がLambdaの実行起点（ハンドラ）です。
@@ -28,4 +40,34 @@ def lambda_handler(event, context):
     return {"statusCode": 200, "body": "Analysis completed successfully."}
 
 
+def precompute_handler(event, context):
+    """
+    スケジュール実行用のハンドラ。その日の予測を全authorについて事前計算する。
+    """
+    print("Precompute function started.")
+
+    db_url = get_parameter("/my-app/database-url")
+    count = precompute(db_url)
+
+    return {"statusCode": 200, "body": f"Precomputed {count} forecasts."}
+
+
+def forecast_handler(event, context):
+    """
+    API Gateway用のハンドラ。事前計算済みの予測を1件返す。
+    クエリパラメータ: author（必須）, date（省略時は今日）
+    """
+    params = (event or {}).get("queryStringParameters") or {}
+    author = params.get("author")
+    if not author:
+        return {"statusCode": 400, "body": json.dumps({"error": "author is required"})}
+
+    db_url = get_parameter("/my-app/database-url")
+    forecast = get_forecast(get_engine(db_url), author, params.get("date"))
+    if forecast is None:
+        return {"statusCode": 404, "body": json.dumps({"error": "forecast not found"})}
+
+    return {"statusCode": 200, "body": json.dumps(forecast, ensure_ascii=False)}
+
+
 # --- 以下、既存のanalysis.pyのコードが続く ---
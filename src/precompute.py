@@ -0,0 +1,167 @@
+from datetime import datetime
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+from analysis_regression import get_weather_api, load_data
+from batch_regression import BatchRidgeRegression
+from sqlalchemy import (
+    Column,
+    Integer,
+    MetaData,
+    PrimaryKeyConstraint,
+    String,
+    Table,
+    create_engine,
+    text,
+)
+from sqlalchemy.engine import Engine
+from type.step import StepAnalyzer
+from type.weather_archive import WeatherArchive
+
+# 1日分の予測結果を保存するテーブル名
+FORECAST_TABLE = "forecast"
+
+FORECAST_COLUMNS = [
+    "author",
+    "forecast_date",
+    "day_type",
+    "predict_temp",
+    "predicted_steps",
+    "predicted_spending",
+]
+
+
+# 読み出しを1回の主キー検索で済ませるため (author, forecast_date) を主キーにする
+forecast_table = Table(
+    FORECAST_TABLE,
+    MetaData(),
+    Column("author", String(255)),
+    Column("forecast_date", String(10)),
+    Column("day_type", String(16)),
+    Column("predict_temp", Integer),
+    Column("predicted_steps", Integer),
+    Column("predicted_spending", Integer),
+    PrimaryKeyConstraint("author", "forecast_date"),
+)
+
+
+def get_today() -> str:
+    """呼び出した時点のJSTの日付をYYYY-MM-DD形式で取得
+
+    Lambdaのコンテナは日付をまたいで再利用されるため、毎回現在時刻から求める。
+    """
+    return datetime.now(ZoneInfo("Asia/Tokyo")).strftime("%Y-%m-%d")
+
+
+def compute_forecasts(
+    df: pd.DataFrame,
+    forecast_date: str,
+    temp: int,
+    humidity: Optional[float] = None,
+) -> pd.DataFrame:
+    """全authorの指定日の予測歩数・予測飲料代をまとめて計算する
+
+    予測対象日以降のデータ（0時直後に届いた当日分など）は使わない。
+    飲料代の記録が無いauthorは全authorをまとめた係数で予測し、
+    それもできない（誰にも記録が無い）authorは結果に含めない。
+    """
+    df = df[pd.to_datetime(df["analysis_date"]) < pd.Timestamp(forecast_date)]
+    steps = StepAnalyzer(df).analyze_all(pd.Timestamp(forecast_date))
+
+    model = BatchRidgeRegression().fit(df)
+    predicted_steps = steps.set_index("author")["predicted_steps"]
+    predictions = model.predict(
+        forecast_date,
+        temp,
+        predicted_steps.reindex(model.authors),
+        humidity=humidity,
+    ).reindex(steps["author"])
+
+    missing = predictions.isna().to_numpy()
+    if missing.any():
+        predictions[missing] = model.predict_pooled(
+            forecast_date,
+            temp,
+            steps["predicted_steps"].to_numpy()[missing],
+            humidity=humidity,
+        )
+        print(f"飲料代の記録が無い{int(missing.sum())}件は全体の係数で予測しました")
+
+    forecasts = steps.assign(
+        forecast_date=forecast_date,
+        predict_temp=temp,
+        predicted_spending=predictions.to_numpy(),
+    )
+    forecasts = forecasts[forecasts["predicted_spending"].notna()]
+    forecasts["predicted_spending"] = (
+        forecasts["predicted_spending"].round().astype(int)
+    )
+    return forecasts[FORECAST_COLUMNS]
+
+
+def save_forecasts(engine: Engine, forecasts: pd.DataFrame) -> None:
+    """予測結果を (author, forecast_date) をキーにしたテーブルへ保存する"""
+    if forecasts.empty:
+        return
+
+    forecast_table.create(engine, checkfirst=True)
+    with engine.begin() as conn:
+        conn.execute(
+            forecast_table.delete().where(
+                forecast_table.c.forecast_date == forecasts["forecast_date"].iloc[0]
+            )
+        )
+        forecasts.to_sql(FORECAST_TABLE, con=conn, if_exists="append", index=False)
+
+
+def get_forecast(
+    engine: Engine, author: str, forecast_date: Optional[str] = None
+) -> Optional[dict]:
+    """保存済みの予測結果を1件取得する（無ければNone、日付の省略時は今日）"""
+    if forecast_date is None:
+        forecast_date = get_today()
+
+    query = f"""
+    SELECT {", ".join(FORECAST_COLUMNS)}
+    FROM {FORECAST_TABLE}
+    WHERE author = :author AND forecast_date = :forecast_date
+    """
+    with engine.connect() as conn:
+        row = (
+            conn.execute(
+                text(query), {"author": author, "forecast_date": forecast_date}
+            )
+            .mappings()
+            .first()
+        )
+    return dict(row) if row else None
+
+
+def precompute(db_url, forecast_date: Optional[str] = None) -> int:
+    """1日分の予測を全authorについて事前計算して保存する
+
+    日付の省略時は実行した日（0時過ぎに実行すると始まったばかりの日）を対象にし、
+    前日までの確定したデータから予測する。
+    """
+    if forecast_date is None:
+        forecast_date = get_today()
+
+    weather_api = get_weather_api()
+    temp_result = weather_api.get_weather_summary("Tokyo", forecast_date)
+    if not temp_result or temp_result["temp_avg"] is None:
+        print("天気データの取得に失敗しました")
+        return 0
+    temp: int = int(temp_result["temp_avg"])
+    print(f"{forecast_date} の予測平均気温: {temp_result['temp_avg']:.1f}℃")
+
+    engine = create_engine(db_url)
+    df = load_data(db_url)
+    df = WeatherArchive(engine, weather_api).enrich(df)
+    forecasts = compute_forecasts(
+        df, forecast_date, temp, temp_result["humidity_avg"]
+    )
+    save_forecasts(engine, forecasts)
+
+    print(f"{len(forecasts)}件の予測結果を保存しました")
+    return len(forecasts)
@@ -0,0 +1,203 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+# 1チャンクあたりの最大要素数（float64で約128MB）
+DEFAULT_MAX_CELLS = 16_000_000
+
+MODEL_COLUMNS = ["coef_temp", "coef_steps", "intercept"]
+
+
+def from_linear_models(models: Dict[str, LinearRegression]) -> pd.DataFrame:
+    """train_model で学習したauthorごとのモデルを係数の表にまとめる"""
+    return pd.DataFrame(
+        [
+            [float(m.coef_[0]), float(m.coef_[1]), float(m.intercept_)]
+            for m in models.values()
+        ],
+        index=pd.Index(list(models), name="author"),
+        columns=MODEL_COLUMNS,
+    )
+
+
+def from_batch_model(model, date, humidity: Optional[float] = None) -> pd.DataFrame:
+    """BatchRidgeRegression を気温・歩数以外の特徴量を固定した係数の表にする
+
+    曜日・前日の飲料代・湿度の寄与は指定日の値で切片に含める。
+    """
+    baseline = model.predict(date, 0.0, 0.0, humidity=humidity)
+    names = model.feature_names
+    return pd.DataFrame(
+        {
+            "coef_temp": model.coef_[:, names.index("avg_temp")],
+            "coef_steps": model.coef_[:, names.index("final_steps")],
+            "intercept": baseline.to_numpy(),
+        },
+        index=pd.Index(model.authors, name="author"),
+    )
+
+
+def spend_grid(models: pd.DataFrame, temps, steps) -> np.ndarray:
+    """(author, 気温, 歩数) の予測飲料代をブロードキャストで一度に計算する"""
+    temps = np.asarray(temps, dtype=float)
+    steps = np.asarray(steps, dtype=float)
+    coef_temp = models["coef_temp"].to_numpy(dtype=float)[:, None, None]
+    coef_steps = models["coef_steps"].to_numpy(dtype=float)[:, None, None]
+    intercept = models["intercept"].to_numpy(dtype=float)[:, None, None]
+    return (
+        intercept
+        + coef_temp * temps[None, :, None]
+        + coef_steps * steps[None, None, :]
+    )
+
+
+def _chunk_ranges(
+    n_authors: int, n_temps: int, n_steps: int, max_cells: int
+) -> Iterator[Tuple[slice, slice, slice]]:
+    """チャンクごとの (authorの範囲, 気温の範囲, 歩数の範囲) を返す
+
+    authorごとに分け、1author分でも大きすぎる場合は気温の方向に、
+    1author・1気温分でも大きすぎる場合は歩数の方向にも分ける。
+    どのチャンクも max_cells 要素（1未満なら1要素）以下になる。
+    """
+    steps_step = max(1, min(n_steps, max_cells))
+    temp_step = max(1, min(n_temps, max_cells // steps_step))
+    author_step = max(1, max_cells // (temp_step * steps_step))
+
+    for a in range(0, n_authors, author_step):
+        for t in range(0, n_temps, temp_step):
+            for s in range(0, n_steps, steps_step):
+                yield (
+                    slice(a, a + author_step),
+                    slice(t, t + temp_step),
+                    slice(s, s + steps_step),
+                )
+
+
+def iter_spend_grid(
+    models: pd.DataFrame, temps, steps, max_cells: int = DEFAULT_MAX_CELLS
+) -> Iterator[Tuple[slice, slice, slice, np.ndarray]]:
+    """予測飲料代の3次元配列をメモリに収まる大きさのチャンクに分けて返す
+
+    (authorの範囲, 気温の範囲, 歩数の範囲, 配列) を返す。
+    """
+    temps = np.asarray(temps, dtype=float)
+    steps = np.asarray(steps, dtype=float)
+    for authors, temp_range, steps_range in _chunk_ranges(
+        len(models), len(temps), len(steps), max_cells
+    ):
+        yield authors, temp_range, steps_range, spend_grid(
+            models.iloc[authors], temps[temp_range], steps[steps_range]
+        )
+
+
+def break_even_temperature(
+    models: pd.DataFrame, steps, budget: float = 0.0
+) -> pd.DataFrame:
+    """予測飲料代が budget に達する気温をauthor・歩数ごとに求める
+
+    気温の係数が0のauthorはNaNになる。
+    """
+    steps = np.asarray(steps, dtype=float)
+    coef_temp = models["coef_temp"].to_numpy(dtype=float)[:, None]
+    coef_steps = models["coef_steps"].to_numpy(dtype=float)[:, None]
+    intercept = models["intercept"].to_numpy(dtype=float)[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        temp = (budget - intercept - coef_steps * steps[None, :]) / coef_temp
+    temp[np.broadcast_to(coef_temp == 0, temp.shape)] = np.nan
+    return pd.DataFrame(
+        temp, index=models.index, columns=pd.Index(steps, name="steps")
+    )
+
+
+def summarize_grid(
+    models: pd.DataFrame,
+    temps,
+    steps,
+    budget: float = 0.0,
+    max_cells: int = DEFAULT_MAX_CELLS,
+    workers: int = 1,
+) -> pd.DataFrame:
+    """グリッド全体の予測飲料代をauthorごとに集計する
+
+    3次元配列全体は保持せず、チャンクごとに最小・最大・合計を集計する。
+    workers を2以上にするとチャンクの計算をスレッドで並列に行う。
+    損益分岐気温は歩数の中央値での値を返す。
+    """
+    temps = np.asarray(temps, dtype=float)
+    steps = np.asarray(steps, dtype=float)
+    n_authors = len(models)
+
+    minimum = np.full(n_authors, np.inf)
+    maximum = np.full(n_authors, -np.inf)
+    total = np.zeros(n_authors)
+    over_budget = np.zeros(n_authors)
+
+    def reduce(chunk):
+        # 配列はワーカー内で作るので、同時に保持するのは workers 個のチャンクだけ
+        authors, temp_range, steps_range = chunk
+        grid = spend_grid(
+            models.iloc[authors], temps[temp_range], steps[steps_range]
+        )
+        return (
+            authors,
+            grid.min(axis=(1, 2)),
+            grid.max(axis=(1, 2)),
+            grid.sum(axis=(1, 2)),
+            (grid > budget).sum(axis=(1, 2)),
+        )
+
+    chunks = _chunk_ranges(n_authors, len(temps), len(steps), max_cells)
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(reduce, chunks))
+    else:
+        results = map(reduce, chunks)
+
+    for authors, chunk_min, chunk_max, chunk_sum, chunk_over in results:
+        minimum[authors] = np.minimum(minimum[authors], chunk_min)
+        maximum[authors] = np.maximum(maximum[authors], chunk_max)
+        total[authors] += chunk_sum
+        over_budget[authors] += chunk_over
+
+    cells = len(temps) * len(steps)
+    median_steps = float(np.median(steps))
+    break_even = break_even_temperature(models, [median_steps], budget)
+
+    return pd.DataFrame(
+        {
+            "min_spending": minimum,
+            "max_spending": maximum,
+            "mean_spending": total / cells,
+            "over_budget_ratio": over_budget / cells,
+            "break_even_temp": break_even.iloc[:, 0].to_numpy(),
+        },
+        index=models.index,
+    )
+
+
+if __name__ == "__main__":
+    import os
+
+    from analysis_regression import load_data, train_model
+
+    df = load_data(os.environ["DB_URL"])
+    models = from_linear_models(
+        {
+            author: train_model(author_df)[0]
+            for author, author_df in df.groupby("author")
+        }
+    )
+
+    # 気温10〜40℃ × 歩数0〜20,000歩 のシナリオ
+    temps = np.arange(10, 41)
+    steps = np.arange(0, 20001, 500)
+    summary = summarize_grid(models, temps, steps, budget=500)
+
+    print(f"シナリオ数: {len(models)} × {len(temps)} × {len(steps)}")
+    print(summary)
+    summary.to_csv("scenario_summary.csv")
+    print("\n=== scenario_summary.csvに保存しました ===")
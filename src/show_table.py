@@ -1,14 +1,301 @@
+import argparse
 import os
+from typing import Dict, List, Optional
 
 import pandas as pd
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
 
+# 確認したいテーブル名
+TABLE_NAME = "activity"
 
-def main():
+# キーセットページネーションに使うキー（一意とは限らない）
+KEY_COLUMNS = ["author", "created_at"]
+
+# 並び順。同じキーの行も順序が一意に決まるよう残りのカラムも並べる
+ORDER_COLUMNS = KEY_COLUMNS + ["steps", "paid_monney", "temp"]
+
+# 取得可能なカラム（SQLに埋め込むためホワイトリストで制限する）
+COLUMNS = ["author", "temp", "steps", "paid_monney", "created_at"]
+
+INDEX_NAME = "idx_activity_keyset"
+
+# インデックスを張れる (author, created_at) の型
+INDEXABLE_TYPES = {"author": "varchar", "created_at": "datetime"}
+
+
+def _select_columns(columns: Optional[List[str]]) -> str:
+    """射影するカラムのSELECT句を作る（キーのカラムは常に含める）"""
+    columns = columns or COLUMNS
+    unknown = [c for c in columns if c not in COLUMNS]
+    if unknown:
+        raise ValueError(f"不明なカラムです: {unknown}")
+    selected = KEY_COLUMNS + [c for c in columns if c not in KEY_COLUMNS]
+    return ", ".join(selected)
+
+
+def _filters(author=None, start=None, end=None) -> tuple:
+    """author・期間の絞り込み条件とパラメータを作る"""
+    conditions = []
+    params = {}
+    if author is not None:
+        conditions.append("author = :author")
+        params["author"] = author
+    if start is not None:
+        conditions.append("created_at >= :start")
+        params["start"] = start
+    if end is not None:
+        conditions.append("created_at < :end")
+        params["end"] = end
+    return conditions, params
+
+
+def fetch_page(
+    engine: Engine,
+    columns: Optional[List[str]] = None,
+    author: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    after: Optional[tuple] = None,
+    page_size: int = 100,
+) -> pd.DataFrame:
+    """(author, created_at) のキーセットで1ページ分を取得する
+
+    after には前のページの next_cursor(page) を渡す。
+    同じ (author, created_at) の行がページをまたいでも取りこぼさないよう、
+    そのキー以降を取得し、前のページまでに返した同じキーの行数だけ読み飛ばす。
+    読み飛ばすのは同じキーの行だけなので、何ページ目でもインデックスを辿るだけで済む。
     """
-    データベースに接続し、指定したテーブルの内容を読み込んで表示する。
+    conditions, params = _filters(author, start, end)
+    skip = 0
+    if after is not None:
+        conditions.append(
+            "(author > :after_author"
+            " OR (author = :after_author AND created_at >= :after_created_at))"
+        )
+        params["after_author"], params["after_created_at"] = after[:2]
+        skip = int(after[2]) if len(after) > 2 else 0
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    query = f"""
+    SELECT {_select_columns(columns)}
+    FROM {TABLE_NAME}
+    {where}
+    ORDER BY {", ".join(ORDER_COLUMNS)}
+    LIMIT :page_size OFFSET :skip
     """
+    params.update({"page_size": page_size, "skip": skip})
+    return pd.read_sql(text(query), engine, params=params)
+
+
+def next_cursor(page: pd.DataFrame, after: Optional[tuple] = None) -> tuple:
+    """次のページを取得するための (author, created_at, 読み飛ばす行数) を返す"""
+    last = page.iloc[-1]
+    key = (last["author"], last["created_at"])
+    same_key = (page["author"] == key[0]) & (page["created_at"] == key[1])
+    skip = int(same_key.sum())
+    # ページ全体が前のページと同じキーなら、読み飛ばした分も足す
+    if after is not None and len(after) > 2 and same_key.all():
+        if (str(after[0]), str(after[1])) == (str(key[0]), str(key[1])):
+            skip += int(after[2])
+    return key[0], key[1], skip
+
+
+def sample_rows(
+    engine: Engine,
+    fraction: float,
+    limit: int = 100,
+    columns: Optional[List[str]] = None,
+    author: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    unbiased: bool = False,
+) -> pd.DataFrame:
+    """おおよそ fraction の割合で行をランダムに抽出する（最大 limit 件）
+
+    ORDER BY を付けずに LIMIT で打ち切るため、fraction × 行数が limit を
+    大きく超えると走査順の先頭側の行に偏る。unbiased=True の場合は、
+    条件に合う行数から limit 件前後になる割合まで fraction を下げて偏りを抑える。
+    その代わり条件に合う行をすべて走査することになる（条件が無ければテーブル全体）。
+    """
+    if unbiased:
+        filtered = author is not None or start is not None or end is not None
+        if filtered:
+            total = count_rows(engine, author=author, start=start, end=end)
+        else:
+            total = estimate_count(engine)
+        if total > 0:
+            # 取りこぼしで limit 件を下回りにくいよう少し多めにする
+            fraction = min(fraction, 1.5 * limit / total)
+
+    conditions, params = _filters(author, start, end)
+    conditions.append("RAND() < :fraction")
+    params.update({"fraction": fraction, "limit": limit})
+
+    query = f"""
+    SELECT {_select_columns(columns)}
+    FROM {TABLE_NAME}
+    WHERE {' AND '.join(conditions)}
+    LIMIT :limit
+    """
+    return pd.read_sql(text(query), engine, params=params)
+
+
+def estimate_count(engine: Engine) -> int:
+    """テーブル統計から行数の概算を取得する（COUNT(*)の全件走査を避ける）"""
+    query = """
+    SELECT TABLE_ROWS
+    FROM information_schema.TABLES
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name
+    """
+    with engine.connect() as conn:
+        rows = conn.execute(text(query), {"table_name": TABLE_NAME}).scalar()
+    return int(rows or 0)
+
+
+def count_rows(engine: Engine, author=None, start=None, end=None) -> int:
+    """条件に合う行数を正確に数える"""
+    conditions, params = _filters(author, start, end)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    with engine.connect() as conn:
+        return int(
+            conn.execute(
+                text(f"SELECT COUNT(*) FROM {TABLE_NAME} {where}"), params
+            ).scalar()
+        )
+
+
+def _column_types(engine: Engine) -> Dict[str, str]:
+    """activityの各カラムの型（小文字）を取得する"""
+    query = """
+    SELECT COLUMN_NAME, DATA_TYPE
+    FROM information_schema.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name
+    """
+    with engine.connect() as conn:
+        rows = conn.execute(text(query), {"table_name": TABLE_NAME}).all()
+    return {name: data_type.lower() for name, data_type in rows}
+
+
+def index_exists(engine: Engine) -> bool:
+    """ページネーション用のインデックスが作成済みか"""
+    query = """
+    SELECT COUNT(*)
+    FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE()
+      AND TABLE_NAME = :table_name
+      AND INDEX_NAME = :index_name
+    """
+    params = {"table_name": TABLE_NAME, "index_name": INDEX_NAME}
+    with engine.connect() as conn:
+        return int(conn.execute(text(query), params).scalar()) > 0
+
+
+def migrate_key_columns(engine: Engine) -> bool:
+    """author・created_atをインデックスを張れる型に変換する（変換した場合True）
+
+    to_sqlで作成した古いテーブルはauthor・created_atがTEXT型のことがある。
+    ALTER TABLEはテーブル全体を作り直してロックするため、メンテナンス時に
+    一度だけ実行する。変換済みなら何もしない。NULLの行があれば変換せずにエラーにする。
+    """
+    types = _column_types(engine)
+    if all(types.get(c) == t for c, t in INDEXABLE_TYPES.items()):
+        return False
+
+    null_query = (
+        f"SELECT COUNT(*) FROM {TABLE_NAME} "
+        "WHERE author IS NULL OR created_at IS NULL"
+    )
+    with engine.connect() as conn:
+        nulls = int(conn.execute(text(null_query)).scalar())
+    if nulls:
+        raise ValueError(
+            f"author・created_atがNULLの行が{nulls:,}件あるため変換できません"
+        )
+
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                f"ALTER TABLE {TABLE_NAME} "
+                "MODIFY author VARCHAR(255) NOT NULL, "
+                "MODIFY created_at DATETIME NOT NULL"
+            )
+        )
+    return True
+
+
+def create_index(engine: Engine) -> bool:
+    """キーセットページネーション用のインデックスを作成する（作成した場合True）
+
+    ORDER BY をインデックスだけで満たせるよう、並び順のカラムすべてに張る。
+    作成済みなら何もしない。テーブルの型は変更しないため、
+    author・created_atがTEXT型なら先に migrate_key_columns を実行する。
+    """
+    if index_exists(engine):
+        return False
+
+    types = _column_types(engine)
+    if any(types.get(c) != t for c, t in INDEXABLE_TYPES.items()):
+        raise ValueError(
+            "author・created_atがインデックスを張れる型ではありません。"
+            "先に --migrate-key-columns を実行してください"
+        )
+
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                f"CREATE INDEX {INDEX_NAME} ON {TABLE_NAME} "
+                f"({', '.join(ORDER_COLUMNS)})"
+            )
+        )
+    return True
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=f"テーブル '{TABLE_NAME}' を閲覧する")
+    parser.add_argument("--author", help="authorで絞り込む")
+    parser.add_argument("--start", help="この日時以降 (YYYY-MM-DD)")
+    parser.add_argument("--end", help="この日時より前 (YYYY-MM-DD)")
+    parser.add_argument(
+        "--columns", nargs="+", choices=COLUMNS, help="表示するカラム"
+    )
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=1, help="表示するページ数")
+    parser.add_argument(
+        "--after",
+        nargs="+",
+        metavar="KEY",
+        help="AUTHOR CREATED_AT [SKIP]: 前のページで表示した次のページのキー",
+    )
+    parser.add_argument("--sample", type=float, help="ランダム抽出する割合 (0-1)")
+    parser.add_argument(
+        "--unbiased",
+        action="store_true",
+        help="ランダム抽出の偏りを抑える（条件に合う行をすべて走査する）",
+    )
+    parser.add_argument("--count", action="store_true", help="行数の概算を表示")
+    parser.add_argument("--exact-count", action="store_true", help="行数を正確に数える")
+    parser.add_argument(
+        "--migrate-key-columns",
+        action="store_true",
+        help="author・created_atをインデックスを張れる型に変換（テーブルをロックする）",
+    )
+    parser.add_argument(
+        "--create-index", action="store_true", help="ページネーション用インデックスを作成"
+    )
+    args = parser.parse_args(argv)
+    if args.after is not None and len(args.after) not in (2, 3):
+        parser.error("--after には AUTHOR CREATED_AT [SKIP] を指定してください")
+    return args
+
+
+def main(argv=None):
+    """
+    データベースに接続し、指定したテーブルの内容をページ単位で読み込んで表示する。
+    """
+    args = parse_args(argv)
+
     # --- 1. 環境変数の読み込みとデータベースへの接続設定 ---
     load_dotenv()
     db_url = os.getenv("DB_URL")
@@ -24,21 +311,67 @@ def main():
         print(f"❌ データベース接続中にエラーが発生しました: {e}")
         return
 
-    # --- 2. データベースからデータを読み込む ---
-    # 確認したいテーブル名を指定
-    table_name = "activity"
+    filters = {"author": args.author, "start": args.start, "end": args.end}
 
     try:
-        print(f"\nテーブル '{table_name}' の内容を読み込んでいます...")
-        # pandasのread_sql関数でテーブル全体をDataFrameとして読み込む
-        df = pd.read_sql(f"SELECT * FROM {table_name}", con=engine)
+        if args.migrate_key_columns:
+            if migrate_key_columns(engine):
+                print("✅ author・created_atの型を変換しました。")
+            else:
+                print("✅ author・created_atは変換済みです。")
 
-        # --- 3. 読み込んだデータを表示 ---
-        if df.empty:
-            print(f"✅ テーブル '{table_name}' は存在しますが、データは空です。")
-        else:
-            print(f"✅ テーブル '{table_name}' の内容:")
+        if args.create_index:
+            if create_index(engine):
+                print(f"✅ インデックス '{INDEX_NAME}' を作成しました。")
+            else:
+                print(f"✅ インデックス '{INDEX_NAME}' は作成済みです。")
+
+        if args.count:
+            print(f"行数の概算: {estimate_count(engine):,}件")
+        if args.exact_count:
+            print(f"行数: {count_rows(engine, **filters):,}件")
+
+        # --- 2. データベースからデータを読み込む ---
+        if args.sample is not None:
+            df = sample_rows(
+                engine,
+                args.sample,
+                limit=args.page_size,
+                columns=args.columns,
+                unbiased=args.unbiased,
+                **filters,
+            )
+            print(f"\nテーブル '{TABLE_NAME}' からランダムに抽出した行:")
             print(df)
+            return
+
+        print(f"\nテーブル '{TABLE_NAME}' の内容を読み込んでいます...")
+        after = tuple(args.after) if args.after else None
+        pages = 0
+        cursor = None
+        while pages < args.pages:
+            page = fetch_page(
+                engine,
+                columns=args.columns,
+                after=after,
+                page_size=args.page_size,
+                **filters,
+            )
+            # --- 3. 読み込んだデータを表示 ---
+            if page.empty:
+                if pages == 0:
+                    print(f"✅ テーブル '{TABLE_NAME}' に該当するデータはありません。")
+                break
+            print(f"✅ テーブル '{TABLE_NAME}' の内容 ({pages + 1}ページ目):")
+            print(page)
+            pages += 1
+            cursor = after = next_cursor(page, after)
+            if len(page) < args.page_size:
+                cursor = None
+                break
+
+        if cursor is not None:
+            print(f"\n次のページ: --after '{cursor[0]}' '{cursor[1]}' {cursor[2]}")
 
     except Exception as e:
         print(f"\n❌ データの読み込み中にエラーが発生しました: {e}")
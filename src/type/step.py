@@ -1,13 +1,21 @@
 import pandas as pd
+import os
+import sys
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
+if __name__ == "__main__":
+    # python type/step.py で直接実行した場合も src/ 直下のモジュールをインポートできるようにする
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from csv_cache import load_csv
+
 class StepAnalyzer:
     def __init__(self, df=None, csv_file="dammy_step_data.csv"):
         if df is not None:
             self.df = df
         else:
-            self.df = pd.read_csv(csv_file)
+            self.df = load_csv(csv_file)
     
     def get_day_type(self, date=None):
         """日付から曜日タイプを取得"""
@@ -48,6 +56,23 @@ class StepAnalyzer:
             'predicted_steps': avg_steps
         }
 
+    def analyze_all(self, date=None):
+        """全authorについて指定日の曜日データをまとめて分析（データベース形式のみ）"""
+        day_type = self.get_day_type(date)
+        day_names = pd.to_datetime(self.df['analysis_date']).dt.day_name()
+        today_data = self.df[day_names == day_type]
+
+        stats = today_data.groupby('author')['final_steps'].agg(['count', 'mean'])
+        result = pd.DataFrame({'author': self.df['author'].unique()})
+        result = result.merge(stats, left_on='author', right_index=True, how='left')
+
+        # 該当する曜日のデータが無いauthorは analyze_today と同じ既定値にする
+        result['day_type'] = day_type
+        result['count'] = result['count'].fillna(0).astype(int)
+        result['avg_steps'] = result['mean'].fillna(0).astype(int)
+        result['predicted_steps'] = result['mean'].fillna(8000).astype(int)
+        return result[['author', 'day_type', 'count', 'avg_steps', 'predicted_steps']]
+
 if __name__ == "__main__":
     analyzer = StepAnalyzer()
     
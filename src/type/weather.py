@@ -1,4 +1,5 @@
-from datetime import datetime
+import json
+from datetime import datetime, timedelta
 
 import requests
 
@@ -27,15 +28,15 @@ class MeteoWeatherAPI:
             print(f"Geocoding error: {e}")
             return None, None
 
-    def get_historical_weather(self, lat, lon, date_str):
-        """過去の天気データを取得"""
+    def get_historical_weather(self, lat, lon, date_str, end_date_str=None):
+        """過去の天気データを取得（end_date_strを指定すると期間でまとめて取得）"""
         try:
             url = "https://api.open-meteo.com/v1/forecast"
             params = {
                 "latitude": lat,
                 "longitude": lon,
                 "start_date": date_str,
-                "end_date": date_str,
+                "end_date": end_date_str or date_str,
                 "daily": "temperature_2m_max,temperature_2m_min,temperature_2m_mean,relative_humidity_2m_mean,surface_pressure_mean",
                 "timezone": "auto",
             }
@@ -51,32 +52,91 @@ class MeteoWeatherAPI:
 
     def get_weather_summary(self, location, date_str):
         """指定地域・日付の天気サマリーを取得"""
+        summaries = self.get_weather_summaries(location, date_str, date_str)
+        if not summaries:
+            return None
+        return summaries[0]
+
+    def get_weather_summaries(self, location, start_date_str, end_date_str):
+        """指定地域・期間の日ごとの天気サマリーを1回のリクエストで取得"""
         try:
             lat, lon = self.get_coordinates(location)
             if lat is None:
                 return None
 
-            data = self.get_historical_weather(lat, lon, date_str)
+            data = self.get_historical_weather(lat, lon, start_date_str, end_date_str)
             if not data or "daily" not in data:
                 return None
 
             daily = data["daily"]
 
-            return {
-                "date": date_str,
-                "location": location,
-                "temp_min": daily["temperature_2m_min"][0],
-                "temp_max": daily["temperature_2m_max"][0],
-                "temp_avg": daily["temperature_2m_mean"][0],
-                "humidity_avg": daily["relative_humidity_2m_mean"][0],
-                "pressure_avg": daily["surface_pressure_mean"][0],
-            }
+            return [
+                {
+                    "date": date_str,
+                    "location": location,
+                    "temp_min": daily["temperature_2m_min"][i],
+                    "temp_max": daily["temperature_2m_max"][i],
+                    "temp_avg": daily["temperature_2m_mean"][i],
+                    "humidity_avg": daily["relative_humidity_2m_mean"][i],
+                    "pressure_avg": daily["surface_pressure_mean"][i],
+                }
+                for i, date_str in enumerate(daily["time"])
+            ]
 
         except Exception as e:
             print(f"Weather summary error: {e}")
             return None
 
 
+class FixtureWeatherAPI(MeteoWeatherAPI):
+    """APIレスポンスと同じ形式のJSONファイルから天気データを返すスタブ（オフライン用）"""
+
+    def __init__(self, fixture_file="weather_fixture.json"):
+        super().__init__()
+        with open(fixture_file, encoding="utf-8") as f:
+            self.fixture = json.load(f)
+
+    def get_coordinates(self, location):
+        """フィクスチャの緯度経度を返す"""
+        return self.fixture["latitude"], self.fixture["longitude"]
+
+    def get_historical_weather(self, lat, lon, date_str, end_date_str=None):
+        """フィクスチャから指定期間の日次データを返す
+
+        フィクスチャに無い日付は、暦の上で最も近い日（同じ月日があればその日）の
+        データで代用する。今日・明日の日付でもオフラインで実行できるようにするため。
+        """
+        start = datetime.strptime(date_str, "%Y-%m-%d")
+        end = datetime.strptime(end_date_str or date_str, "%Y-%m-%d")
+        daily = self.fixture["daily"]
+
+        dates = []
+        indices = []
+        day = start
+        while day <= end:
+            dates.append(day.strftime("%Y-%m-%d"))
+            indices.append(self._nearest_index(day))
+            day += timedelta(days=1)
+
+        result = {key: [values[i] for i in indices] for key, values in daily.items()}
+        result["time"] = dates
+        return {"latitude": lat, "longitude": lon, "daily": result}
+
+    def _nearest_index(self, day):
+        """指定日に最も近いフィクスチャの日のインデックス（年をまたいで月日で比較）"""
+        times = self.fixture["daily"]["time"]
+        day_str = day.strftime("%Y-%m-%d")
+        if day_str in times:
+            return times.index(day_str)
+
+        def distance(i):
+            d = datetime.strptime(times[i], "%Y-%m-%d").timetuple().tm_yday
+            diff = abs(d - day.timetuple().tm_yday)
+            return min(diff, 366 - diff)
+
+        return min(range(len(times)), key=distance)
+
+
 if __name__ == "__main__":
     weather = MeteoWeatherAPI()
 
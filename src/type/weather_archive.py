@@ -0,0 +1,105 @@
+import pandas as pd
+from sqlalchemy import bindparam, inspect, text
+from type.weather import MeteoWeatherAPI
+
+# 日ごとの天気サマリーを保存するテーブル名
+WEATHER_TABLE = "weather_daily"
+
+WEATHER_COLUMNS = [
+    "date",
+    "location",
+    "temp_min",
+    "temp_max",
+    "temp_avg",
+    "humidity_avg",
+    "pressure_avg",
+]
+
+
+class WeatherArchive:
+    """日ごとの天気サマリーを日付をキーにしたテーブルに蓄積する
+
+    未取得の日付だけを1回のAPIリクエストでまとめて取得し、
+    集約済みデータへは1回のmergeで結合する。
+    """
+
+    def __init__(self, engine, weather_api=None, location="Tokyo"):
+        self.engine = engine
+        self.weather_api = weather_api or MeteoWeatherAPI()
+        self.location = location
+
+    def load(self, start_date_str, end_date_str):
+        """保存済みの天気サマリーを期間指定で読み込む"""
+        if not inspect(self.engine).has_table(WEATHER_TABLE):
+            return pd.DataFrame(columns=WEATHER_COLUMNS)
+
+        query = f"""
+        SELECT {", ".join(WEATHER_COLUMNS)}
+        FROM {WEATHER_TABLE}
+        WHERE location = :location AND date BETWEEN :start AND :end
+        ORDER BY date
+        """
+        return pd.read_sql(
+            text(query),
+            self.engine,
+            params={
+                "location": self.location,
+                "start": start_date_str,
+                "end": end_date_str,
+            },
+        )
+
+    def update(self, start_date_str, end_date_str):
+        """期間内で未保存の日付の天気サマリーを取得して保存する"""
+        stored = self.load(start_date_str, end_date_str)
+        dates = pd.date_range(start_date_str, end_date_str, freq="D").strftime(
+            "%Y-%m-%d"
+        )
+        missing = dates.difference(stored["date"].astype(str))
+        if missing.empty:
+            return 0
+
+        summaries = self.weather_api.get_weather_summaries(
+            self.location, missing.min(), missing.max()
+        )
+        if not summaries:
+            print("天気データの取得に失敗しました")
+            return 0
+
+        fetched = pd.DataFrame(summaries, columns=WEATHER_COLUMNS)
+        fetched = fetched[fetched["date"].isin(missing)]
+        if fetched.empty:
+            return 0
+
+        with self.engine.begin() as conn:
+            if inspect(conn).has_table(WEATHER_TABLE):
+                stmt = text(
+                    f"DELETE FROM {WEATHER_TABLE} "
+                    "WHERE location = :location AND date IN :dates"
+                ).bindparams(bindparam("dates", expanding=True))
+                conn.execute(
+                    stmt,
+                    {"location": self.location, "dates": fetched["date"].tolist()},
+                )
+            fetched.to_sql(WEATHER_TABLE, con=conn, if_exists="append", index=False)
+        return len(fetched)
+
+    def enrich(self, daily_df):
+        """集約済みデータ（authorごと・日ごと）に同じ日の天気サマリーを結合する"""
+        if daily_df.empty:
+            return daily_df.reindex(
+                columns=list(daily_df.columns) + WEATHER_COLUMNS[2:]
+            )
+
+        analysis_date = pd.to_datetime(daily_df["analysis_date"])
+        start = analysis_date.min().strftime("%Y-%m-%d")
+        end = analysis_date.max().strftime("%Y-%m-%d")
+        self.update(start, end)
+
+        weather = self.load(start, end).drop(columns=["location"])
+        weather["date"] = pd.to_datetime(weather["date"])
+
+        enriched = daily_df.assign(_date=analysis_date).merge(
+            weather, left_on="_date", right_on="date", how="left"
+        )
+        return enriched.drop(columns=["_date", "date"])
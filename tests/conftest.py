@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Lambdaと同じく src/ 直下のモジュールをトップレベルとしてインポートする
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src")
+sys.path.insert(0, SRC_DIR)
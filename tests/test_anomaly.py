@@ -0,0 +1,76 @@
+import os
+
+import pandas as pd
+import pytest
+from anomaly import ActivityAnomalyDetector
+from conftest import SRC_DIR
+from csv_cache import load_csv
+
+
+@pytest.fixture
+def activity(tmp_path, monkeypatch):
+    """insert_dummy_data.py と同じ経路でダミーのactivityを読み込む"""
+    monkeypatch.setenv("CSV_CACHE_DIR", str(tmp_path))
+    return load_csv(os.path.join(SRC_DIR, "dummy_activity.csv")).copy()
+
+
+def _row(df, author, created_at):
+    mask = (df["author"] == author) & (df["created_at"] == created_at)
+    return df.index[mask][0]
+
+
+def test_clean_data_is_not_quarantined(activity):
+    clean, quarantined = ActivityAnomalyDetector().split(activity)
+    assert quarantined.empty
+    assert len(clean) == len(activity)
+
+
+def test_spike_does_not_hide_behind_next_row(activity):
+    spike = _row(activity, "Taro Yamada", "2025-07-05 11:00:00")
+    after = _row(activity, "Taro Yamada", "2025-07-05 12:00:00")
+    activity.loc[spike, "steps"] = 99999
+
+    _, quarantined = ActivityAnomalyDetector().split(activity)
+
+    assert quarantined.loc[spike, "anomaly"] == "steps_spike"
+    # 不正な値の次の正常な行は「減少」として隔離されない
+    assert after not in quarantined.index
+    assert len(quarantined) == 1
+
+
+def test_backwards_reading_is_caught(activity):
+    row = _row(activity, "Hanako Sato", "2025-07-06 15:00:00")
+    activity.loc[row, "steps"] = 5
+
+    _, quarantined = ActivityAnomalyDetector().split(activity)
+
+    assert list(quarantined.index) == [row]
+    assert quarantined.loc[row, "anomaly"] == "steps_backwards"
+
+
+def test_spend_spike_is_caught(activity):
+    row = _row(activity, "Jiro Suzuki", "2025-07-07 14:00:00")
+    activity.loc[row, "paid_monney"] += 5000
+
+    _, quarantined = ActivityAnomalyDetector().split(activity)
+
+    assert quarantined.loc[row, "anomaly"] == "spend_spike"
+
+
+def test_state_carries_over_between_batches(activity):
+    detector = ActivityAnomalyDetector()
+    detector.split(activity)
+
+    # 前のバッチの最後と同じ日に累積値が減っている
+    last = activity.sort_values("created_at").iloc[-1]
+    batch = pd.DataFrame(
+        {
+            "author": [last["author"]],
+            "temp": [last["temp"]],
+            "steps": [last["steps"] - 1],
+            "paid_monney": [last["paid_monney"]],
+            "created_at": [last["created_at"] + pd.Timedelta(minutes=30)],
+        }
+    )
+    checked = detector.check(batch)
+    assert checked["anomaly"].tolist() == ["steps_backwards"]
@@ -0,0 +1,140 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from analysis_regression import train_model
+from batch_regression import BatchRidgeRegression, build_features
+from conftest import SRC_DIR
+
+TWO_FEATURES = ["avg_temp", "final_steps"]
+
+
+@pytest.fixture
+def daily():
+    """load_data と同じ集約をダミーのactivityに対して行う"""
+    activity = pd.read_csv(os.path.join(SRC_DIR, "dummy_activity.csv"))
+    activity["analysis_date"] = activity["created_at"].str[:10]
+    return (
+        activity.groupby(["author", "analysis_date"], as_index=False)
+        .agg(
+            avg_temp=("temp", "mean"),
+            final_steps=("steps", "max"),
+            final_paid_monney=("paid_monney", "max"),
+        )
+        .sort_values(["author", "analysis_date"])
+        .reset_index(drop=True)
+    )
+
+
+def _synthetic(n_authors, n_days, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2025-01-01", periods=n_days).strftime("%Y-%m-%d")
+    df = pd.DataFrame(
+        {
+            "author": np.repeat([f"user{i}" for i in range(n_authors)], n_days),
+            "analysis_date": np.tile(dates, n_authors),
+            "avg_temp": rng.uniform(10, 35, n_authors * n_days),
+            "final_steps": rng.integers(2000, 15000, n_authors * n_days),
+        }
+    )
+    df["final_paid_monney"] = (
+        20 * df["avg_temp"] + 0.05 * df["final_steps"] + rng.normal(0, 50, len(df))
+    )
+    return df
+
+
+def test_matches_linear_regression_on_two_features(daily):
+    model = BatchRidgeRegression(alpha=1e-9, min_days=0, features=TWO_FEATURES)
+    model.fit(daily)
+
+    for author, author_df in daily.groupby("author"):
+        expected, X, y = train_model(author_df)
+        i = model.authors.get_loc(author)
+        np.testing.assert_allclose(model.coef_[i], expected.coef_, rtol=1e-6)
+        assert model.intercept_[i] == pytest.approx(expected.intercept_, rel=1e-6)
+        assert model.r2_score_[i] == pytest.approx(expected.score(X, y), rel=1e-6)
+
+
+def test_matches_sklearn_ridge_without_pooling(daily):
+    from sklearn.linear_model import Ridge
+    from sklearn.preprocessing import StandardScaler
+
+    # 全authorの係数がほぼ0になる（事前分布が0になる）よう目的変数を置き換えて比較する
+    df = daily.copy()
+    df["final_paid_monney"] = np.random.default_rng(0).normal(0, 1, len(df))
+    model = BatchRidgeRegression(alpha=5.0, min_days=0, features=TWO_FEATURES)
+    model.fit(df)
+
+    author = model.authors[0]
+    author_df = df[df["author"] == author]
+    X = StandardScaler().fit_transform(author_df[TWO_FEATURES])
+    y = author_df["final_paid_monney"]
+    # 事前分布の分だけ目的変数をずらすと、0に縮小する通常のリッジ回帰と同じ問題になる
+    scale = author_df[TWO_FEATURES].std(ddof=0).to_numpy()
+    prior = model.pooled_coef_ * scale
+    ridge = Ridge(alpha=5.0).fit(X, y - X @ prior)
+    np.testing.assert_allclose(model.coef_[0] * scale, ridge.coef_ + prior, rtol=1e-6)
+
+
+def test_empty_frame(daily):
+    model = BatchRidgeRegression().fit(daily.iloc[:0])
+    assert len(model.authors) == 0
+    assert model.predict("2025-07-12", 25, 8000).empty
+
+
+def test_missing_values_do_not_poison_author(daily):
+    daily.loc[daily.index[0], "avg_temp"] = np.nan
+    daily.loc[daily.index[1], "final_steps"] = np.nan
+    model = BatchRidgeRegression().fit(daily)
+    assert np.isfinite(model.coef_).all()
+    assert np.isfinite(model.predict("2025-07-12", 25, 8000)).all()
+
+
+def test_previous_day_spend_uses_calendar_day(daily):
+    author = daily["author"].iloc[0]
+    gap = daily[daily["author"] == author].iloc[[0, 1, 3]]
+    features = build_features(gap)
+
+    first, second, after_gap = features["prev_paid_monney"]
+    assert second == gap["final_paid_monney"].iloc[0]
+    # 前日の記録が無い日はauthorの平均で補う
+    assert after_gap == pytest.approx(gap["final_paid_monney"].mean())
+    assert first == pytest.approx(gap["final_paid_monney"].mean())
+
+
+def test_constant_feature_inherits_pooled_coefficient_in_raw_units():
+    df = _synthetic(20, 28)
+    # 1人だけ平日のデータしかない（土日のone-hotが変化しない）
+    weekend = pd.to_datetime(df["analysis_date"]).dt.dayofweek >= 5
+    df = df[~((df["author"] == "user0") & weekend)]
+
+    model = BatchRidgeRegression().fit(df)
+    saturday = model.feature_names.index("is_Saturday")
+    assert model.coef_[0, saturday] == pytest.approx(model.pooled_coef_[saturday])
+
+
+def test_sparse_author_gets_stable_coefficients():
+    df = _synthetic(20, 30)
+    sparse = df[df["author"] == "user0"].iloc[:3]
+    df = pd.concat([df[df["author"] != "user0"], sparse])
+
+    model = BatchRidgeRegression(features=TWO_FEATURES).fit(df)
+    i = model.authors.get_loc("user0")
+    np.testing.assert_allclose(model.coef_[i], [20, 0.05], rtol=0.5)
+
+
+def test_throughput_is_comparable_to_sklearn_loop():
+    df = _synthetic(300, 60)
+
+    start = time.perf_counter()
+    for _, author_df in df.groupby("author"):
+        train_model(author_df)
+    loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    BatchRidgeRegression().fit(df)
+    batch = time.perf_counter() - start
+
+    assert batch < loop, f"sklearn loop: {loop:.3f}s, batch ridge: {batch:.3f}s"
@@ -0,0 +1,112 @@
+import os
+
+import pandas as pd
+import pytest
+from csv_cache import iter_csv_chunks, load_csv
+
+SCHEMA = {
+    "dtype": {"author": "category", "steps": "int64"},
+    "parse_dates": ["created_at"],
+}
+
+
+@pytest.fixture
+def csv_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("CSV_CACHE_DIR", str(tmp_path / "cache"))
+    path = tmp_path / "activity.csv"
+    _write(
+        path, [("a", 100, "2025-07-01 10:00:00"), ("b", 200, "2025-07-01 11:00:00")]
+    )
+    return str(path)
+
+
+def _write(path, rows, mtime_ns=None):
+    pd.DataFrame(rows, columns=["author", "steps", "created_at"]).to_csv(
+        path, index=False
+    )
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def _parse_count(monkeypatch):
+    """pd.read_csv が呼ばれた回数を数える"""
+    calls = []
+    read_csv = pd.read_csv
+
+    def counting(*args, **kwargs):
+        calls.append(1)
+        return read_csv(*args, **kwargs)
+
+    monkeypatch.setattr(pd, "read_csv", counting)
+    return calls
+
+
+def test_second_load_uses_cache(csv_file, monkeypatch):
+    first = load_csv(csv_file, SCHEMA)
+    calls = _parse_count(monkeypatch)
+    second = load_csv(csv_file, SCHEMA)
+
+    assert not calls
+    # メモリマップした列と同じ値・型で読み込める
+    pd.testing.assert_frame_equal(first, second.copy())
+    assert isinstance(second["author"].dtype, pd.CategoricalDtype)
+
+
+def test_cache_is_invalidated_when_mtime_changes(csv_file, monkeypatch):
+    load_csv(csv_file, SCHEMA)
+    mtime_ns = os.stat(csv_file).st_mtime_ns
+    # サイズは同じで内容と更新日時だけ変わる
+    _write(
+        csv_file,
+        [("a", 999, "2025-07-01 10:00:00"), ("b", 200, "2025-07-01 11:00:00")],
+        mtime_ns=mtime_ns + 1_000_000_000,
+    )
+    calls = _parse_count(monkeypatch)
+
+    assert load_csv(csv_file, SCHEMA)["steps"].tolist() == [999, 200]
+    assert calls
+
+
+def test_cache_is_invalidated_when_size_changes(csv_file, monkeypatch):
+    load_csv(csv_file, SCHEMA)
+    mtime_ns = os.stat(csv_file).st_mtime_ns
+    # 更新日時は同じでサイズだけ変わる
+    _write(csv_file, [("a", 100, "2025-07-01 10:00:00")], mtime_ns=mtime_ns)
+    calls = _parse_count(monkeypatch)
+
+    assert load_csv(csv_file, SCHEMA)["author"].tolist() == ["a"]
+    assert calls
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_iter_csv_chunks(csv_file, monkeypatch, cached):
+    rows = [(f"user{i % 3}", i, f"2025-07-01 {i:02d}:00:00") for i in range(7)]
+    _write(csv_file, rows)
+    expected = pd.read_csv(csv_file, **SCHEMA)
+    if cached:
+        load_csv(csv_file, SCHEMA)
+    calls = _parse_count(monkeypatch)
+
+    chunks = list(iter_csv_chunks(csv_file, chunksize=3, schema=SCHEMA))
+
+    assert [len(c) for c in chunks] == [3, 3, 1]
+    # キャッシュがあればCSVをパースしない
+    assert bool(calls) is not cached
+    result = pd.concat(chunks, ignore_index=True)
+    # チャンクごとのカテゴリは異なりうるので値で比較する
+    result["author"] = result["author"].astype(str)
+    expected["author"] = expected["author"].astype(str)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_unwritable_cache_falls_back_to_parsing(csv_file, monkeypatch, tmp_path):
+    blocker = tmp_path / "blocker"
+    blocker.write_text("")
+    # ファイルの下にはディレクトリを作れない
+    monkeypatch.setenv("CSV_CACHE_DIR", str(blocker / "cache"))
+
+    assert load_csv(csv_file, SCHEMA)["steps"].tolist() == [100, 200]
+    assert list(iter_csv_chunks(csv_file, schema=SCHEMA))[0]["steps"].tolist() == [
+        100,
+        200,
+    ]
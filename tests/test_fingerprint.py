@@ -0,0 +1,34 @@
+import pytest
+from fingerprint import RESULT_COLUMNS, load_results, save_results
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+
+
+def _row(author, prediction):
+    row = dict.fromkeys(RESULT_COLUMNS, 0)
+    row.update(author=author, fingerprint="abc", analysis_date="2025-07-11")
+    row["prediction"] = prediction
+    return row
+
+
+def test_missing_table_returns_empty(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    results = load_results(engine)
+    assert results.empty
+    assert list(results.columns) == RESULT_COLUMNS
+
+
+def test_round_trip(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    save_results(engine, [_row("a", 1), _row("b", 2)])
+    save_results(engine, [_row("a", 3)])
+
+    results = load_results(engine).set_index("author")["prediction"]
+    assert results.sort_index().to_dict() == {"a": 3, "b": 2}
+
+
+def test_database_errors_are_not_swallowed(tmp_path):
+    # 開けないデータベースは「保存済みの結果が無い」扱いにしない
+    engine = create_engine(f"sqlite:///{tmp_path / 'missing' / 'db.sqlite'}")
+    with pytest.raises(OperationalError):
+        load_results(engine)
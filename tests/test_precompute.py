@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+from precompute import FORECAST_COLUMNS, compute_forecasts
+
+
+@pytest.fixture
+def daily():
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2025-06-01", periods=28).strftime("%Y-%m-%d")
+    df = pd.DataFrame(
+        {
+            "author": np.repeat(["a", "b", "c"], len(dates)),
+            "analysis_date": np.tile(dates, 3),
+            "avg_temp": rng.uniform(15, 30, 3 * len(dates)),
+            "final_steps": rng.integers(3000, 12000, 3 * len(dates)),
+            "humidity_avg": rng.uniform(40, 80, 3 * len(dates)),
+        }
+    )
+    df["final_paid_monney"] = 20 * df["avg_temp"] + 0.05 * df["final_steps"]
+    return df
+
+
+def test_author_without_spending_is_predicted_from_pooled_fit(daily):
+    daily.loc[daily["author"] == "c", "final_paid_monney"] = np.nan
+
+    forecasts = compute_forecasts(daily, "2025-06-29", 25, humidity=60.0)
+
+    assert list(forecasts.columns) == FORECAST_COLUMNS
+    assert sorted(forecasts["author"]) == ["a", "b", "c"]
+    spending = forecasts.set_index("author")["predicted_spending"]
+    # 全員が同じ式で支出しているので、全体の係数でも近い値になる
+    assert spending["c"] == pytest.approx(spending["a"], rel=0.2)
+
+
+def test_no_spending_at_all_skips_authors(daily):
+    daily["final_paid_monney"] = np.nan
+    assert compute_forecasts(daily, "2025-06-29", 25).empty
+
+
+@pytest.mark.parametrize("humidity", [None, np.nan])
+def test_missing_humidity_uses_author_mean(daily, humidity):
+    forecasts = compute_forecasts(daily, "2025-06-29", 25, humidity=humidity)
+    assert len(forecasts) == 3
+    assert forecasts["predicted_spending"].dtype.kind == "i"
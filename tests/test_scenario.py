@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+from analysis_regression import predict_spending, train_model
+from batch_regression import BatchRidgeRegression
+from scenario import (
+    break_even_temperature,
+    from_batch_model,
+    from_linear_models,
+    iter_spend_grid,
+    spend_grid,
+    summarize_grid,
+)
+
+TEMPS = np.arange(10, 41, 5)
+STEPS = np.arange(0, 20001, 2500)
+
+
+@pytest.fixture
+def daily():
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2025-06-01", periods=30).strftime("%Y-%m-%d")
+    authors = [f"user{i}" for i in range(5)]
+    df = pd.DataFrame(
+        {
+            "author": np.repeat(authors, len(dates)),
+            "analysis_date": np.tile(dates, len(authors)),
+            "avg_temp": rng.uniform(10, 35, len(authors) * len(dates)),
+            "final_steps": rng.integers(2000, 15000, len(authors) * len(dates)),
+        }
+    )
+    df["final_paid_monney"] = (
+        20 * df["avg_temp"] + 0.05 * df["final_steps"] + rng.normal(0, 50, len(df))
+    )
+    return df
+
+
+@pytest.fixture
+def linear_models(daily):
+    return {
+        author: train_model(author_df)[0]
+        for author, author_df in daily.groupby("author")
+    }
+
+
+def test_spend_grid_matches_predict_spending(linear_models):
+    grid = spend_grid(from_linear_models(linear_models), TEMPS, STEPS)
+
+    assert grid.shape == (len(linear_models), len(TEMPS), len(STEPS))
+    for i, model in enumerate(linear_models.values()):
+        for t, temp in enumerate(TEMPS):
+            for s, steps in enumerate(STEPS):
+                assert round(grid[i, t, s]) == predict_spending(model, temp, steps)
+
+
+@pytest.mark.parametrize("max_cells", [1, 4, 7, len(STEPS) * 3, 10_000])
+def test_iter_spend_grid_chunks_reassemble(linear_models, max_cells):
+    models = from_linear_models(linear_models)
+    full = spend_grid(models, TEMPS, STEPS)
+
+    result = np.full(full.shape, np.nan)
+    for authors, temps, steps, chunk in iter_spend_grid(
+        models, TEMPS, STEPS, max_cells=max_cells
+    ):
+        # 歩数の数より小さい上限でもチャンクは上限を超えない
+        assert chunk.size <= max_cells
+        assert np.isnan(result[authors, temps, steps]).all()
+        result[authors, temps, steps] = chunk
+
+    np.testing.assert_array_equal(result, full)
+
+
+@pytest.mark.parametrize("max_cells", [5, 10_000])
+def test_summarize_grid_is_the_same_with_threads(linear_models, max_cells):
+    models = from_linear_models(linear_models)
+    serial = summarize_grid(models, TEMPS, STEPS, budget=800, max_cells=max_cells)
+    parallel = summarize_grid(
+        models, TEMPS, STEPS, budget=800, max_cells=max_cells, workers=4
+    )
+    pd.testing.assert_frame_equal(serial, parallel)
+
+    full = spend_grid(models, TEMPS, STEPS)
+    np.testing.assert_allclose(serial["min_spending"], full.min(axis=(1, 2)))
+    np.testing.assert_allclose(serial["max_spending"], full.max(axis=(1, 2)))
+    np.testing.assert_allclose(serial["mean_spending"], full.mean(axis=(1, 2)))
+    np.testing.assert_allclose(
+        serial["over_budget_ratio"], (full > 800).mean(axis=(1, 2))
+    )
+
+
+def test_break_even_temperature_reaches_budget(linear_models):
+    models = from_linear_models(linear_models)
+    temps = break_even_temperature(models, STEPS, budget=800)
+
+    spend = (
+        models["intercept"].to_numpy()[:, None]
+        + models["coef_temp"].to_numpy()[:, None] * temps.to_numpy()
+        + models["coef_steps"].to_numpy()[:, None] * STEPS[None, :]
+    )
+    np.testing.assert_allclose(spend, 800)
+
+
+def test_from_batch_model_matches_predict(daily):
+    daily["humidity_avg"] = 60.0
+    model = BatchRidgeRegression().fit(daily)
+    date = "2025-07-01"
+    models = from_batch_model(model, date, humidity=55.0)
+    grid = spend_grid(models, TEMPS, STEPS)
+
+    for t, temp in enumerate(TEMPS):
+        for s, steps in enumerate(STEPS):
+            expected = model.predict(date, temp, steps, humidity=55.0)
+            np.testing.assert_allclose(grid[:, t, s], expected.to_numpy())
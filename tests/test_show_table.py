@@ -0,0 +1,59 @@
+import pandas as pd
+from show_table import TABLE_NAME, fetch_page, next_cursor
+from sqlalchemy import create_engine
+
+
+COLUMNS = ["author", "temp", "steps", "paid_monney", "created_at"]
+
+
+def _engine(tmp_path, rows):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    pd.DataFrame(rows, columns=COLUMNS).to_sql(TABLE_NAME, engine, index=False)
+    return engine
+
+
+def _all_pages(engine, page_size, **filters):
+    pages = []
+    after = None
+    while True:
+        page = fetch_page(engine, after=after, page_size=page_size, **filters)
+        if page.empty:
+            break
+        pages.append(page)
+        after = next_cursor(page, after)
+    return pd.concat(pages, ignore_index=True)
+
+
+def test_rows_with_the_same_key_are_not_skipped(tmp_path):
+    rows = [
+        ("a", 20.0, 100, 0, "2025-07-01 09:00:00"),
+        ("a", 20.0, 200, 0, "2025-07-01 10:00:00"),
+        # 同じ時刻の行がページの境界をまたぐ
+        ("a", 21.0, 300, 100, "2025-07-01 10:00:00"),
+        ("a", 21.0, 300, 150, "2025-07-01 10:00:00"),
+        ("a", 21.0, 300, 150, "2025-07-01 10:00:00"),
+        ("a", 22.0, 400, 200, "2025-07-01 11:00:00"),
+        ("b", 23.0, 50, 0, "2025-07-01 10:00:00"),
+    ]
+    engine = _engine(tmp_path, rows)
+
+    for page_size in (1, 2, 3):
+        result = _all_pages(engine, page_size)[COLUMNS]
+        expected = pd.DataFrame(rows, columns=COLUMNS)
+        pd.testing.assert_frame_equal(
+            result.sort_values(COLUMNS).reset_index(drop=True),
+            expected.sort_values(COLUMNS).reset_index(drop=True),
+        )
+
+
+def test_filters_are_applied_to_every_page(tmp_path):
+    rows = [
+        (author, 20.0, i, 0, f"2025-07-01 {i:02d}:00:00")
+        for author in ("a", "b")
+        for i in range(5)
+    ]
+    engine = _engine(tmp_path, rows)
+
+    result = _all_pages(engine, 2, author="b", start="2025-07-01 01:00:00")
+    assert result["author"].eq("b").all()
+    assert result["steps"].tolist() == [1, 2, 3, 4]